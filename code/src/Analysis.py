@@ -0,0 +1,93 @@
+"""This module implements e-class analyses.
+
+Classes:
+    Analysis: Base class of all e-class analyses (no data).
+    ConstantFolding: Attaches the integer value to E-Classes of constant terms.
+
+Implementation:
+    An e-class analysis attaches data from a semilattice to every E-Class and
+    is based on the e-class analyses of egg (e-graphs-good):
+        url: https://docs.rs/egg/latest/egg/trait.Analysis.html
+
+    The E-Graph calls the following methods:
+
+    - ``make(egraph, enode)``: Data of a new E-Node (children are canonical).
+    - ``merge(data1, data2)``: Data of two merged E-Classes (join).
+    - ``modify(egraph, eclass_id)``: Called whenever the data of an E-Class
+      was set or changed, it may add E-Nodes and merge E-Classes.
+
+    If the data of an E-Class changes, the data of its parents is recomputed
+    during ``rebuild``.
+"""
+
+import re
+from ENode import ENode
+
+
+class Analysis:
+    """Class that represents an e-class analysis without data. Serves as base
+    class for other analyses.
+    """
+
+    def make(self, egraph, enode):
+        """Returns the data of a new E-Node."""
+        return None
+
+    def merge(self, data1, data2):
+        """Returns the data of two merged E-Classes."""
+        return data1 if data1 is not None else data2
+
+    def modify(self, egraph, eclass_id):
+        """Modifies an E-Class after its data was set or changed."""
+
+
+class ConstantFolding(Analysis):
+    """Class that represents constant folding.
+
+    The data of an E-Class is the integer value of its terms or None. Integer
+    literals are values, and operators with constant arguments are evaluated
+    (division only if it is exact, shifts only up to max_shift). The literal
+    of a non-negative value is added to its E-Class, so that the extraction
+    can pick it.
+
+    Attributes:
+        - max_shift: Maximum shift amount that is evaluated.
+    """
+
+    def __init__(self, max_shift=64):
+        """Initialises class. Takes one optional argument.
+
+        :param max_shift: Maximum shift amount that is evaluated.
+        :returns: None.
+        """
+        self.max_shift = max_shift
+
+    def make(self, egraph, enode):
+        """Returns the value of an E-Node or None if it is not constant."""
+        if not enode.arguments:
+            return int(enode.key) if re.fullmatch("[0-9]+", enode.key) else None
+        if len(enode.arguments) != 2:
+            return None
+        a = egraph.m[egraph._find(enode.arguments[0])].data
+        b = egraph.m[egraph._find(enode.arguments[1])].data
+        if a is None or b is None:
+            return None
+        if enode.key == "+":
+            return a + b
+        if enode.key == "-":
+            return a - b
+        if enode.key == "*":
+            return a * b
+        if enode.key == "/" and b != 0 and a % b == 0:
+            return a // b
+        if enode.key == "<<" and 0 <= b <= self.max_shift:
+            return a << b
+        if enode.key == ">>" and 0 <= b <= self.max_shift:
+            return a >> b
+        return None
+
+    def modify(self, egraph, eclass_id):
+        """Adds the literal of a non-negative value to the E-Class."""
+        value = egraph.m[eclass_id].data
+        if value is not None and value >= 0:
+            egraph.merge(eclass_id, egraph._add(ENode(str(value), [])))
@@ -0,0 +1,130 @@
+"""This module implements cost functions for the extraction of terms.
+
+Classes:
+    CostFunction: Table of operator weights combined by sum or max.
+    AstSize: Number of nodes of a term.
+    AstDepth: Depth of a term.
+    OperatorWeights: Weighted sum over the operators of a term.
+
+Implementation:
+    A cost function is resolved into a lookup table (key -> cost) once, when
+    it is created. The cost of an E-Node is its own weight combined with the
+    costs of its children, either by adding them (``SUM``) or by taking the
+    most expensive child (``MAX``). Both combinations are monotone, which the
+    priority-queue based extraction (see Extraction.py) relies on. Thus,
+    negative weights are rejected: on a cyclic E-Graph, every pass around a
+    cycle would make a term cheaper and the extraction would not terminate.
+"""
+
+SUM = "sum"
+MAX = "max"
+
+
+class CostFunction:
+    """Class that represents a cost function for extraction.
+
+    Attributes:
+        - name: Short description of the cost function.
+        - weights: Dictionary with the following mapping: key -> cost.
+        - default: Cost of keys that are not in weights.
+        - combine: How the costs of children are combined (SUM or MAX).
+
+    Methods:
+        node_cost(key)
+        enode_cost(key, child_costs)
+    """
+
+    def __init__(self, name, weights=None, default=0, combine=SUM):
+        """Initialises class. Takes one to four arguments.
+
+        :param name: Short description of the cost function.
+        :param weights: Mapping key -> cost, defaults to no weights.
+        :param default: Cost of keys that are not in weights.
+        :param combine: SUM or MAX.
+        :returns: None.
+        :raises ValueError: If combine is invalid or a weight is negative.
+        """
+        if combine not in (SUM, MAX):
+            raise ValueError("combine must be '" + SUM + "' or '" + MAX + "'.")
+        weights = dict(weights or {})
+        for key, weight in list(weights.items()) + [("default", default)]:
+            if weight < 0:
+                raise ValueError(
+                    "Weight of '" + key + "' must not be negative, got " + str(weight) + "."
+                )
+        self.name = name
+        self.weights = weights
+        self.default = default
+        self.combine = combine
+
+    def node_cost(self, key):
+        """Returns the weight of a key."""
+        return self.weights.get(key, self.default)
+
+    def enode_cost(self, key, child_costs):
+        """Returns the cost of an E-Node from its key and the child costs."""
+        if self.combine == MAX:
+            return self.weights.get(key, self.default) + max(child_costs, default=0)
+        return self.weights.get(key, self.default) + sum(child_costs)
+
+    def __eq__(self, other):
+        """Returns True if both cost functions assign the same costs."""
+        if not isinstance(other, CostFunction):
+            return NotImplemented
+        return (self.weights, self.default, self.combine) == (
+            other.weights,
+            other.default,
+            other.combine,
+        )
+
+    def __hash__(self):
+        """Returns a hash of weights, default and combination."""
+        return hash((frozenset(self.weights.items()), self.default, self.combine))
+
+    def __str__(self):
+        """Returns the name of the cost function."""
+        return self.name
+
+
+class AstSize(CostFunction):
+    """Class that represents the cost function 'number of nodes of a term'."""
+
+    def __init__(self):
+        """Initialises class. Takes no arguments."""
+        super().__init__("AST size", default=1)
+
+
+class AstDepth(CostFunction):
+    """Class that represents the cost function 'depth of a term'."""
+
+    def __init__(self):
+        """Initialises class. Takes no arguments."""
+        super().__init__("AST depth", default=1, combine=MAX)
+
+
+class OperatorWeights(CostFunction):
+    """Class that represents a weighted sum over the operators of a term.
+
+    Without arguments, the weights are: ['+'|'-'|'<<'|'>>']: 1, ['*']: 2,
+    ['/']: 3, [other]: 0.
+    """
+
+    DEFAULT_WEIGHTS = {"+": 1, "-": 1, "<<": 1, ">>": 1, "*": 2, "/": 3}
+
+    def __init__(self, weights=None, default=0):
+        """Initialises class. Takes two optional arguments.
+
+        :param weights: Mapping key -> cost, defaults to DEFAULT_WEIGHTS.
+        :param default: Cost of keys that are not in weights.
+        :returns: None.
+        """
+        if weights is None:
+            weights = OperatorWeights.DEFAULT_WEIGHTS
+        keys_by_weight = {}
+        for key, weight in weights.items():
+            keys_by_weight.setdefault(weight, []).append(key)
+        name = ", ".join(
+            "[" + "|".join("'" + key + "'" for key in keys) + "]: " + str(weight)
+            for weight, keys in sorted(keys_by_weight.items())
+        )
+        super().__init__(name + ", [other]: " + str(default), weights, default)
@@ -0,0 +1,88 @@
+"""This module implements the debug history of the EGraphService.
+
+Classes:
+    DebugHistory: List of lists of TraceEvents with a cache of rendered steps.
+
+Implementation:
+    The history is indexed like the former list of lists of debug entries:
+    ``history[major][minor]`` is the TraceEvent of a step (see Trace.py),
+    ``history[major][minor][0]`` its message. The events do not hold DOT
+    strings but a position in the journal of the E-Graph, so the memory of
+    the history grows with the changes of the E-Graph instead of its size
+    times the number of steps. The DOT strings (and JSON objects, see
+    GraphJson.py) of the most recently requested steps are kept in a
+    least-recently-used cache.
+"""
+
+from collections import OrderedDict
+
+
+class DebugHistory:
+    """Class that represents the debug history of the EGraphService.
+
+    Attributes:
+        - steps: List of lists of TraceEvents.
+        - cache_size: Number of rendered steps that are cached.
+
+    Methods:
+        append(events)
+        is_empty()
+        dot(major, minor)
+        json(major, minor)
+    """
+
+    def __init__(self, cache_size=8):
+        """Initialises class. Takes one optional argument.
+
+        :param cache_size: Number of rendered steps that are cached.
+        :returns: None.
+        """
+        self.steps = [[]]
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        """Returns the number of major steps."""
+        return len(self.steps)
+
+    def __getitem__(self, major):
+        """Returns the list of TraceEvents of a major step."""
+        return self.steps[major]
+
+    def append(self, events):
+        """Appends a list of TraceEvents as new major step."""
+        self.steps.append(events)
+
+    def is_empty(self):
+        """Returns True if no step was recorded."""
+        return self.steps == [[]]
+
+    def dot(self, major, minor):
+        """Returns the DOT string of a step, rendered on the first request.
+
+        :param major: Index of the major step.
+        :param minor: Index of the minor step.
+        :return: str or None
+        """
+        return self._cached((major, minor), self.steps[major][minor].dot)
+
+    def json(self, major, minor):
+        """Returns the JSON object of a step (see GraphJson.py), rendered on
+        the first request.
+
+        :param major: Index of the major step.
+        :param minor: Index of the minor step.
+        :return: dict or None
+        """
+        return self._cached(("json", major, minor), self.steps[major][minor].json)
+
+    def _cached(self, key, render):
+        """Returns the cached result of render or renders and caches it."""
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        result = render()
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
@@ -0,0 +1,189 @@
+"""This module renders E-Graphs in DOT notation.
+
+Functions:
+    eclasses_to_dot: Returns the DOT string of a mapping of E-Classes.
+
+Implementation:
+    The renderer only needs the canonical E-Classes (EClass-ID -> E-Nodes) and
+    a find function for the arguments of the E-Nodes. Thus, it renders live
+    E-Graphs (see ``EGraph.egraph_to_dot``) as well as the snapshots of a
+    debug trace (see Trace.py).
+        url: https://graphviz.org/doc/info/lang.html
+
+    Every E-Class is a cluster and every E-Node a record node with one port
+    per argument. An edge points to the representative E-Node (the first one)
+    of the argument's E-Class and ends at the border of its cluster (lhead).
+    Edges of an E-Node into its own E-Class go through an invisible point.
+
+    The E-Classes are rendered in one pass, which also records the DOT name of
+    every representative E-Node, and the edges in a second pass over the
+    E-Nodes, so the run time is linear in the number of E-Nodes and edges.
+    The E-Nodes of an E-Class are sorted and the points are numbered, so the
+    same E-Graph always results in the same string.
+
+    Large E-Graphs can be reduced before the layout (level of detail):
+
+    - ``hops``: Only E-Classes within k edges (in both directions) of the
+      marked E-Classes, or of the roots if none are marked, are rendered.
+    - ``max_class_size``: E-Classes with more E-Nodes are collapsed into a
+      single summary node, their outgoing edges are omitted.
+    - ``max_nodes``: At most this many nodes are rendered. The E-Classes
+      closest to the marked E-Classes or roots are rendered first.
+
+    Edges to E-Classes that are not rendered are omitted.
+"""
+
+import io
+
+OPERATORS = ("/", "*", "+", "-", "<<", ">>")
+
+
+def _enode_order(enode):
+    """Returns the sort key of an E-Node within its E-Class."""
+    return enode.key, enode.arguments
+
+
+def _neighbourhood(classes, find, centers, hops):
+    """Returns the EClass-IDs within hops of the centers (all E-Classes
+    reachable from them if hops is None), ordered by their distance.
+    """
+    neighbours = {eclass_id: set() for eclass_id in classes}
+    for eclass_id, enodes in classes.items():
+        for enode in enodes:
+            for argument in enode.arguments:
+                argument = find(argument)
+                neighbours[eclass_id].add(argument)
+                neighbours[argument].add(eclass_id)
+    order = list(dict.fromkeys(centers))
+    distance = dict.fromkeys(order, 0)
+    for eclass_id in order:
+        if hops is not None and distance[eclass_id] >= hops:
+            continue
+        for neighbour in neighbours[eclass_id]:
+            if neighbour not in distance:
+                distance[neighbour] = distance[eclass_id] + 1
+                order.append(neighbour)
+    return order
+
+
+def _select(classes, find, centers, hops, max_class_size, max_nodes):
+    """Returns the set of EClass-IDs to render or None for all of them."""
+    if hops is None and max_nodes is None:
+        return None
+    if centers:
+        order = _neighbourhood(classes, find, centers, hops)
+        if hops is None:
+            reached = set(order)
+            order.extend(eclass_id for eclass_id in classes if eclass_id not in reached)
+    else:
+        order = list(classes)
+    if max_nodes is None:
+        return set(order)
+    selected = set()
+    number_of_nodes = 0
+    for eclass_id in order:
+        size = len(classes[eclass_id])
+        if max_class_size is not None and size > max_class_size:
+            size = 1
+        if number_of_nodes + size > max_nodes:
+            break
+        selected.add(eclass_id)
+        number_of_nodes += size
+    return selected
+
+
+def eclasses_to_dot(
+    classes, find, nodesep=0.5, ranksep=0.5, marked_eclasses=(), roots=(),
+    hops=None, max_class_size=None, max_nodes=None,
+):
+    """Returns a string of E-Classes in DOT notation.
+
+    :param classes: Mapping canonical EClass-ID -> E-Nodes.
+    :param find: Function that returns the canonical EClass-ID of an argument.
+    :param nodesep: Graphviz nodesep.
+    :param ranksep: Graphviz ranksep.
+    :param marked_eclasses: EClass-IDs that are coloured.
+    :param roots: EClass-IDs of the roots, the centers of hops and max_nodes
+        if no E-Class is marked.
+    :param hops: Only render E-Classes within hops of the centers.
+    :param max_class_size: Collapse E-Classes with more E-Nodes.
+    :param max_nodes: Maximum number of rendered nodes.
+    :return: str
+    """
+    marked = {find(eclass_id) for eclass_id in marked_eclasses}
+    centers = [find(eclass_id) for eclass_id in marked_eclasses] or [
+        find(eclass_id) for eclass_id in roots
+    ]
+    centers = [eclass_id for eclass_id in centers if eclass_id in classes]
+    selected = _select(classes, find, centers, hops, max_class_size, max_nodes)
+    buffer = io.StringIO()
+    write = buffer.write
+    write(
+        "digraph parent { graph [compound=true, nodesep=" + str(nodesep)
+        + ", ranksep=" + str(ranksep) + "]\n" + """node [fillcolor=white
+        fontname=\"Times-Bold\" fontsize=20 shape=record style=\"rounded, filled\"]\n"""
+    )
+    representatives = {}
+    rendered = []
+    node_identifier = 0
+    for eclass_id, enodes in classes.items():
+        if selected is not None and eclass_id not in selected:
+            continue
+        fillcolor = 'fillcolor=\"navajowhite\"'
+        if eclass_id in marked:
+            fillcolor = 'fillcolor=\"crimson\"'
+        write(
+            'subgraph \"cluster-' + str(eclass_id)
+            + '\" { graph [compound=true '
+            + fillcolor
+            + ' style="dashed, rounded, filled"]\n'
+        )
+        if max_class_size is not None and len(enodes) > max_class_size:
+            name = '"summary-' + str(eclass_id) + '"'
+            representatives[eclass_id] = name
+            write(
+                name + '[label="' + str(len(enodes)) + ' E-Nodes" '
+                + ', fillcolor=\"white\"]\n}\n'
+            )
+            continue
+        for enode in sorted(enodes, key=_enode_order):
+            name = '"' + enode.key
+            if enode.key in OPERATORS:
+                name += str(node_identifier)
+            name += '"'
+            representatives.setdefault(eclass_id, name)
+            rendered.append((eclass_id, name, str(node_identifier), enode))
+            label = enode.key
+            if enode.key in ("<<", ">>"):
+                label = enode.key[0] + "\\" + enode.key[1]
+            write(
+                name + '[label="<' + str(node_identifier) + "0> | \\"
+                + label + " | <" + str(node_identifier) + '1>" '
+                + ', fillcolor=\"white\"]\n'
+            )
+            node_identifier += 1
+        write("}\n")
+
+    points = 0
+    for eclass_id, name, node_identifier, enode in rendered:
+        for port, argument in enumerate(enode.arguments):
+            argument = find(argument)
+            if argument not in representatives:
+                continue
+            source = name + ":" + node_identifier + str(port)
+            target = (
+                representatives[argument]
+                + ' [lhead="cluster-' + str(argument) + '"]\n'
+            )
+            if argument == eclass_id:
+                point = '"point-' + str(points) + '"'
+                points += 1
+                write(
+                    point + " [height=0, width=0, shape=point]\n"
+                    + source + " -> " + point + " [dir=none]\n"
+                    + point + " -> " + target
+                )
+            else:
+                write(source + " -> " + target)
+    write("}")
+    return buffer.getvalue()
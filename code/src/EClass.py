@@ -4,20 +4,24 @@ Classes:
     EClass: Represents an EClass together with its unique EClass-ID.
 """
 
-import uuid
-
 
 class EClass:
     """Class that represents an EClass.
 
     Attributes:
-        - id: Unique identifier for this class (EClass-ID).
+        - id: Unique identifier for this class (EClass-ID), an integer.
         - nodes: A set of ENodes
         - parents: A Set of tuples with: tuple(ENode, EClass-ID).
+        - data: Data of the e-class analysis (See Analysis.py).
     """
 
-    def __init__(self):
-        """Initialises class. Takes no arguments."""
-        self.id = str(uuid.uuid4())
+    def __init__(self, eclass_id):
+        """Initialises class. Takes one argument.
+
+        :param eclass_id: EClass-ID handed out by the E-Graph.
+        :returns: None.
+        """
+        self.id = eclass_id
         self.nodes = set()
         self.parents = set()
+        self.data = None
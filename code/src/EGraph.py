@@ -19,6 +19,7 @@ Implementation:
     - ``apply_rules``
     - ``get_eclasses``
     - ``equality_saturation``
+    - ``run_equality_saturation``
     - ``_extract_term``
 
     are based on a Google Colab notebook from Zachary DeVito (accessed 2024-11-29):
@@ -27,96 +28,142 @@ Implementation:
 Visualisation:
     Visualising an e-graph can be done by calling
     ``egraph_to_dot(self,nodesep=0.5,ranksep=0.5)``.
-    It will return a string of the e-graph in DOT notation.
+    It will return a string of the e-graph in DOT notation (see Dot.py).
         url: https://graphviz.org/doc/info/lang.html
+    Rule applications only render DOT on request, if they are traced with
+    ``trace=TRACE_FULL`` (see Trace.py).
 """
 
-from scipy.cluster.hierarchy import DisjointSet
+from CostFunction import OperatorWeights
+from Dot import eclasses_to_dot
+from GraphJson import eclasses_to_json
 from EClass import EClass
 from ENode import ENode
+from Extraction import DAG_GREEDY, ExtractionState, extract_dag
+from Pattern import Pattern
+from Runner import RunnerLimits, RunnerReport, SATURATED
+from Scheduler import Scheduler
+from Trace import TRACE_EVENTS, TRACE_MODES, TRACE_OFF, record
+from UnionFind import UnionFind
+from types import MappingProxyType
 import graphviz
 import pathlib
-import math
-import uuid
-import re
+import time
 
 
 class EGraph:
     """Class that represents an E-Graph.
 
     Attributes:
-        - u: Union-find datastructure with EClass-IDs (See EClass.py).
+        - u: Union-find datastructure with EClass-IDs (See UnionFind.py).
         - m: Dictionary with the following mapping: EClass-ID -> EClass.
-        - h: Dictionary with the following mapping: ENode -> E-Class-ID.
+          It only contains canonical E-Classes.
+        - classes: Dictionary with the following mapping:
+          canonical EClass-ID -> set of E-Nodes (the set of the EClass).
+        - h: Hashcons with the following mapping: canonical ENode -> E-Class-ID.
         - pending: List of EClass-IDs that need to be fixed.
+        - eclass_count: Number of E-Classes (canonical EClass-IDs).
+        - enodes_added: Number of E-Nodes added so far (never decreases).
+        - unions_performed: Number of merges performed so far (never decreases).
+        - classes_by_key: Dictionary with the following mapping:
+          E-Node key -> set of EClass-IDs containing an E-Node with that key.
+        - touched: List of EClass-IDs in the order they were created or merged.
+          Its length is the version of the E-Graph.
+        - extraction: ExtractionState with the best E-Node of every E-Class
+          (See Extraction.py).
+        - roots: List of EClass-IDs of the terms registered for extraction.
+        - analysis: E-Class analysis or None (See Analysis.py).
+        - analysis_pending: List of EClass-IDs whose data changed, the data
+          of their parents has to be recomputed.
+        - search_versions: Dictionary with the following mapping:
+          RewriteRule -> version of the E-Graph when it was last searched.
+        - applied_matches: Set of tuples (RewriteRule, EClass-ID, EClass-IDs
+          of the variables) of matches that were applied already.
+        - journal: Journal of all mutations (See Trace.py) or None. It is
+          attached by a trace with TRACE_FULL.
+        - revision: Number of changes of the E-Classes or their E-Nodes
+          (never decreases), it keys the cache of ``egraph_to_dot`` and
+          ``egraph_to_json``.
         - is_saturated: Boolean that specifies if the EGraph is saturated or not.
 
     Methods:
         add_node(ast_node)
+        add_root(eclass_id)
         merge(eclass_id1, eclass_id2)
         rebuild()
+        compact(prune=False)
         apply_rules(rules)
         equality_saturation(rules, etermid)
+        run_equality_saturation(rules, etermid, egraph)
         export_egraph_to_file(filepath, extension="pdf")
-        egraph_to_dot(nodesep=0.5, ranksep=0.5)
+        egraph_to_dot(nodesep=0.5, ranksep=0.5, marked_eclasses=[], hops=None,
+                      max_class_size=None, max_nodes=None)
+        egraph_to_json(marked_eclasses=())
 
         _add(enode)
         _new_singleton_eclass(enode)
         _canonicalize(enode)
         _find(eclass_id)
         _repair(eclass_id)
-        _ematch(node_pattern)
-        _substitute(ast_node, environment)
-        _cost_model(key)
-        _extract_term(eterm_id)
-        _preorder(ast_node)
+        _propagate_data(eclass_id)
+        number_of_enodes()
+        number_of_eclasses()
+        current_version()
+        dirty_since(version)
+
+        _eclasses_with_key(key)
+        _ancestors(eclass_ids, depth)
+        _ematch(eclasses, node_pattern, dirty=None)
+        _substitute(ast_node, environment, memo=None)
+        _extract_term(eterm_id, cost_function=None)
+        _extract_terms(eterm_ids, cost_function=None, share=False)
+        _extract_dag(eterm_ids, cost_function=None, mode=DAG_GREEDY, node_budget=10000)
     """
 
-    def __init__(self):
-        """Initialises class. Takes no arguments."""
-        self.u = DisjointSet()
+    def __init__(self, analysis=None):
+        """Initialises class. Takes one optional argument.
+
+        :param analysis: E-Class analysis (See Analysis.py), e.g.
+            ``ConstantFolding()``.
+        :returns: None.
+        """
+        self.u = UnionFind()
         self.m = {}
         self.h = {}
+        self.classes = {}
+        self._eclasses_view = MappingProxyType(self.classes)
         self.pending = []
-        self.str_repr = ""
+        self.classes_by_key = {}
+        self.eclass_count = 0
+        self.enodes_added = 0
+        self.unions_performed = 0
+        self.touched = []
+        self.search_versions = {}
+        self.applied_matches = set()
+        self.journal = None
+        self.revision = 0
+        self._render_cache = (0, {})
+        self.extraction = ExtractionState()
+        self.roots = []
+        self.analysis = analysis
+        self.analysis_pending = []
         self.is_saturated = False
 
     def _add(self, enode):
         """Adds an E-Node to the E-Graph and returns the corresponding EClass-ID."""
         enode = self._canonicalize(enode)
-        enode_args = [self._find(arg) for arg in enode.arguments]
-
-        canonical_eclass_ids = []
-        for e_node in self.h.keys():
-            e_node.arguments = [self._find(arg) for arg in e_node.arguments]
-            canonical_eclass_ids.append(e_node.arguments)
-        if enode.key not in ("/", "*", "+", "-", "<<", ">>") and enode.key in [
-            key.key for key in self.h.keys()
-        ]:
-            for e_node in self.h.keys():
-                if e_node.key == enode.key:
-                    return self.h[e_node]
-        elif enode in self.h.keys():
-            return self.h[enode]
-        elif (
-            enode.key in [key.key for key in self.h.keys()]
-            and enode_args in canonical_eclass_ids
-        ):
-            for e_node in self.h.keys():
-                e_node.arguments = [self._find(arg) for arg in e_node.arguments]
-                if e_node.key == enode.key and e_node.arguments == enode.arguments:
-                    return self.h[e_node]
-            eclass_id = self._new_singleton_eclass(enode)
-            for child in enode.arguments:
-                self.m[child].parents.add((enode, eclass_id))
-            self.h[enode] = eclass_id
-            return eclass_id
-        else:
-            eclass_id = self._new_singleton_eclass(enode)
-            for child in enode.arguments:
-                self.m[child].parents.add((enode, eclass_id))
-            self.h[enode] = eclass_id
-            return eclass_id
+        if enode in self.h:
+            return self._find(self.h[enode])
+        eclass_id = self._new_singleton_eclass(enode)
+        for child in enode.arguments:
+            self.m[child].parents.add((enode, eclass_id))
+        self.h[enode] = eclass_id
+        self.enodes_added += 1
+        if self.analysis is not None:
+            self.m[eclass_id].data = self.analysis.make(self, enode)
+            self.analysis.modify(self, eclass_id)
+            return self._find(eclass_id)
+        return eclass_id
 
     def add_node(self, ast_node):
         """Takes an AST, recursively transforms them into
@@ -137,12 +184,26 @@ class EGraph:
             else:
                 return self._add(ENode(ast_node.key, []))
 
+    def add_root(self, eclass_id):
+        """Registers an E-Class as root for the extraction of all terms
+        (see ``_extract_terms``) and returns its EClass-ID.
+        """
+        if eclass_id not in self.roots:
+            self.roots.append(eclass_id)
+        return eclass_id
+
     def _new_singleton_eclass(self, enode):
         """Creates a new E-Class."""
-        new_eclass = EClass()
+        new_eclass = EClass(self.u.make_set())
         new_eclass.nodes.add(enode)
-        self.u.add(new_eclass.id)
         self.m[new_eclass.id] = new_eclass
+        self.classes[new_eclass.id] = new_eclass.nodes
+        self.classes_by_key.setdefault(enode.key, set()).add(new_eclass.id)
+        self.touched.append(new_eclass.id)
+        self.eclass_count += 1
+        self.revision += 1
+        if self.journal is not None:
+            self.journal.log(("add", new_eclass.id, enode))
         return new_eclass.id
 
     def _canonicalize(self, enode):
@@ -151,278 +212,348 @@ class EGraph:
 
     def _find(self, eclass_id):
         """Searches in u to find root element of input."""
-        return self.u.__getitem__(eclass_id)
+        return self.u.find(eclass_id)
 
     def merge(self, eclass_id1, eclass_id2):
-        """Merges two E-Classes in u via their IDs and returns the new root ID."""
+        """Merges two E-Classes in u via their IDs and returns the new root ID.
+
+        The E-Nodes and parents of the absorbed E-Class are moved into the
+        E-Class of the new root (the smaller sets into the larger ones) and
+        the absorbed E-Class is removed from m.
+        """
         if self._find(eclass_id1) == self._find(eclass_id2):
             return self._find(eclass_id1)
-        self.u.merge(eclass_id1, eclass_id2)
-        new_id = self._find(eclass_id1)
+        eclass_id1, eclass_id2 = self._find(eclass_id1), self._find(eclass_id2)
+        new_id = self.u.union(eclass_id1, eclass_id2)
+        old_id = eclass_id2 if new_id == eclass_id1 else eclass_id1
+        new_eclass, old_eclass = self.m[new_id], self.m.pop(old_id)
+        del self.classes[old_id]
+        if len(new_eclass.nodes) < len(old_eclass.nodes):
+            new_eclass.nodes, old_eclass.nodes = old_eclass.nodes, new_eclass.nodes
+            self.classes[new_id] = new_eclass.nodes
+        new_eclass.nodes |= old_eclass.nodes
+        if len(new_eclass.parents) < len(old_eclass.parents):
+            new_eclass.parents, old_eclass.parents = old_eclass.parents, new_eclass.parents
+        new_eclass.parents |= old_eclass.parents
+        if self.analysis is not None:
+            new_data, old_data = new_eclass.data, old_eclass.data
+            data = self.analysis.merge(new_data, old_data)
+            new_eclass.data = data
+            if data != new_data or data != old_data:
+                self.analysis_pending.append(new_id)
         self.pending.append(new_id)
+        self.touched.append(old_id)
+        self.touched.append(new_id)
+        self.eclass_count -= 1
+        self.unions_performed += 1
+        self.revision += 1
+        if self.journal is not None:
+            self.journal.log(("union", old_id, new_id))
         return new_id
 
+    def number_of_enodes(self):
+        """Returns the number of E-Nodes in the hashcons."""
+        return len(self.h)
+
+    def number_of_eclasses(self):
+        """Returns the number of E-Classes (canonical EClass-IDs)."""
+        return self.eclass_count
+
+    def current_version(self):
+        """Returns the version of the E-Graph. It increases whenever an
+        E-Class is created or two E-Classes are merged.
+        """
+        return len(self.touched)
+
+    def dirty_since(self, version):
+        """Returns the canonical IDs of all E-Classes that were created or
+        merged since the given version.
+        """
+        return {self._find(eclass_id) for eclass_id in self.touched[version:]}
+
     def rebuild(self):
-        """Rebuilds the E-Graph by processing the pending-list."""
-        for eclass in set([self._find(eclass) for eclass in self.pending]):
-            self._repair(eclass)
-        self.pending = []
+        """Rebuilds the E-Graph by processing the pending-list.
+
+        Repairing an E-Class can merge congruent parents, which adds new
+        EClass-IDs to the pending-list. The pending-list is therefore drained
+        (deduplicated by canonical EClass-ID) until it is empty. Afterwards,
+        the analysis data of the parents of changed E-Classes is recomputed,
+        which can lead to new merges.
+        """
+        while self.pending or self.analysis_pending:
+            while self.pending:
+                todo = {self._find(eclass_id) for eclass_id in self.pending}
+                self.pending = []
+                for eclass_id in todo:
+                    self._repair(self._find(eclass_id))
+            while self.analysis_pending and not self.pending:
+                eclass_id = self._find(self.analysis_pending.pop())
+                self.analysis.modify(self, eclass_id)
+                self._propagate_data(self._find(eclass_id))
+
+    def _propagate_data(self, eclass_id):
+        """Recomputes the analysis data of the parents of an E-Class."""
+        for p_node, p_eclass in list(self.m[eclass_id].parents):
+            p_eclass = self._find(p_eclass)
+            old_data = self.m[p_eclass].data
+            data = self.analysis.merge(
+                old_data, self.analysis.make(self, self._canonicalize(p_node))
+            )
+            if data != old_data:
+                self.m[p_eclass].data = data
+                self.analysis_pending.append(p_eclass)
 
     def _repair(self, eclass_id):
-        """Repairs the E-Graph."""
-        for p_node, p_eclass in self.m[eclass_id].parents:
-            if p_node in self.h.keys():
-                self.h.pop(p_node)
-            p_node = self._canonicalize(p_node)
-            self.h[p_node] = self._find(p_eclass)
-        new_parents = set()
-        for p_node, p_eclass in self.m[eclass_id].parents:
-            p_node = self._canonicalize(p_node)
-            if p_node in [new_parent[0] for new_parent in new_parents]:
-                for new_p_enode, new_p_eclass_id in new_parents:
-                    if new_p_enode == p_node:
-                        self.merge(p_eclass, new_p_eclass_id)
-
-            new_parents.add((p_node, self._find(p_eclass)))
-        self.m[self._find(eclass_id)].parents = new_parents
-
-    def _ematch(self, eclasses, node_pattern):
+        """Repairs the hashcons, the E-Nodes of the parent E-Classes and the
+        parents of an E-Class.
+
+        Congruent parents (parents with the same canonical E-Node) are
+        collapsed via a dictionary keyed by the canonical E-Node. The key is
+        the form stored in h and in the E-Nodes of the parent E-Class, not a
+        form canonicalised again after the merges, so that the next repair
+        can still find and replace it.
+        """
+        eclass = self.m[eclass_id]
+        parents = list(eclass.parents)
+        repaired = []
+        for p_node, p_eclass in parents:
+            self.h.pop(p_node, None)
+            new_p_node = self._canonicalize(p_node)
+            new_p_eclass = self._find(p_eclass)
+            self.h[new_p_node] = new_p_eclass
+            if new_p_node != p_node:
+                p_nodes = self.m[new_p_eclass].nodes
+                p_nodes.discard(p_node)
+                p_nodes.add(new_p_node)
+                self.revision += 1
+                if self.journal is not None:
+                    self.journal.log(("replace", new_p_eclass, p_node, new_p_node))
+            # Keep the entries of the other children in sync, otherwise their
+            # stale form of this parent could not be removed from h later on.
+            for child in set(new_p_node.arguments):
+                if child != eclass_id:
+                    siblings = self.m[child].parents
+                    siblings.discard((p_node, p_eclass))
+                    siblings.add((new_p_node, new_p_eclass))
+            repaired.append((new_p_node, new_p_eclass))
+        new_parents = {}
+        for p_node, p_eclass in repaired:
+            if p_node in new_parents:
+                self.merge(p_eclass, new_parents[p_node])
+            new_parents[p_node] = self._find(p_eclass)
+        # Parents moved into this E-Class by a merge above are kept, the
+        # E-Class is pending again and will be repaired once more. The merges
+        # can also absorb this E-Class, its parents then live in the new root.
+        eclass = self.m[self._find(eclass_id)]
+        added_parents = eclass.parents.difference(parents)
+        eclass.parents = set(new_parents.items()) | added_parents
+
+    def compact(self, prune=False):
+        """Rebuilds the E-Graph and renumbers its E-Classes densely.
+
+        Only canonical E-Classes are kept. If prune is True and roots are
+        registered (see ``add_root``), E-Classes that are not reachable from
+        a root are dropped as well. EClass-IDs, versions, search versions and
+        extraction costs start anew, the counters of added E-Nodes and
+        performed merges are kept.
+
+        :param prune: If True, drop E-Classes unreachable from the roots.
+        :return: dict with {old canonical EClass-ID -> new EClass-ID}
+        """
+        self.rebuild()
+        eclasses = dict(self.get_eclasses())
+        roots = [self._find(root) for root in self.roots]
+        if prune and roots:
+            reachable = set()
+            stack = list(roots)
+            while stack:
+                eclass_id = stack.pop()
+                if eclass_id in reachable:
+                    continue
+                reachable.add(eclass_id)
+                for enode in eclasses[eclass_id]:
+                    stack.extend(enode.arguments)
+            eclasses = {
+                eclass_id: enodes
+                for eclass_id, enodes in eclasses.items()
+                if eclass_id in reachable
+            }
+        mapping = {old_id: new_id for new_id, old_id in enumerate(sorted(eclasses))}
+        old_m = self.m
+        self.u = UnionFind()
+        self.m = {}
+        self.h = {}
+        self.classes.clear()
+        self.classes_by_key = {}
+        for old_id in sorted(eclasses):
+            new_eclass = EClass(self.u.make_set())
+            new_eclass.data = old_m[old_id].data
+            self.m[new_eclass.id] = new_eclass
+            self.classes[new_eclass.id] = new_eclass.nodes
+        for old_id, enodes in eclasses.items():
+            eclass_id = mapping[old_id]
+            for enode in enodes:
+                enode = ENode(enode.key, [mapping[child] for child in enode.arguments])
+                self.m[eclass_id].nodes.add(enode)
+                self.h[enode] = eclass_id
+                self.classes_by_key.setdefault(enode.key, set()).add(eclass_id)
+                for child in enode.arguments:
+                    self.m[child].parents.add((enode, eclass_id))
+        self.eclass_count = len(self.m)
+        self.touched = list(self.m)
+        self.search_versions = {}
+        self.applied_matches = set()
+        self.extraction = ExtractionState(self.extraction.cost_function)
+        self.roots = [mapping[root] for root in roots]
+        self.revision += 1
+        if self.journal is not None:
+            self.journal.log(("compact",))
+            self.journal.keyframe(self)
+        return mapping
+
+    def _eclasses_with_key(self, key):
+        """Returns the canonical IDs of all E-Classes that contain an E-Node
+        with the given key.
+
+        The index may still contain IDs of merged E-Classes. They are
+        canonicalized (and written back) lazily on lookup.
+        """
+        if key not in self.classes_by_key:
+            return set()
+        eclass_ids = {self._find(eclass_id) for eclass_id in self.classes_by_key[key]}
+        self.classes_by_key[key] = eclass_ids
+        return eclass_ids
+
+    def _ancestors(self, eclass_ids, depth):
+        """Returns the canonical IDs of the given E-Classes and of all
+        E-Classes that reach them via at most depth parent steps.
+        """
+        ancestors = {self._find(eclass_id) for eclass_id in eclass_ids}
+        frontier = ancestors
+        for _ in range(depth):
+            next_frontier = set()
+            for eclass_id in frontier:
+                for _, p_eclass in self.m[eclass_id].parents:
+                    p_eclass = self._find(p_eclass)
+                    if p_eclass not in ancestors:
+                        next_frontier.add(p_eclass)
+            ancestors |= next_frontier
+            frontier = next_frontier
+        return ancestors
+
+    def _ematch(self, eclasses, node_pattern, dirty=None):
         """Takes a pattern and matches it to E-Nodes in the E-Graph.
 
+        The pattern is either a compiled ``Pattern`` (see Pattern.py) or the
+        root ASTNode of a pattern, which is compiled on the fly. If a set of
+        dirty EClass-IDs is given, only matches touching one of them are
+        returned and only E-Classes near them are visited.
+
         (DISCLAIMER)
         This method is based on work of Zachary DeVito. For more information,
         please see the implementation section in the module's docstring.
         """
-
-        def _match_in(node_pattern, eid, environment):
-            def enode_matches(node_pattern, enode, environment):
-                if enode.key != node_pattern.key:
-                    return False, environment
-                new_environment = environment
-                for arg_pattern, arg_eclass_id in zip(
-                    [node_pattern.left, node_pattern.right], enode.arguments
-                ):
-                    matched, new_environment = _match_in(
-                        arg_pattern, arg_eclass_id, new_environment
-                    )
-                    if not matched:
-                        return False, environment
-                return True, new_environment
-
-            if (
-                node_pattern.left is None
-                and node_pattern.right is None
-                and not re.match("[0-9]+", node_pattern.key)
-            ):
-                node_key = node_pattern.key
-                if node_key not in environment:
-                    environment = {**environment}
-                    environment[node_key] = eid
-                    return True, environment
-                else:
-                    return environment[node_key] is eid, environment
-            else:
-                eid = self._find(eid)
-                for enode in eclasses[eid]:
-                    matches, env_new = enode_matches(node_pattern, enode, environment)
-                    if matches:
-                        return True, env_new
-                return False, environment
-
+        if not isinstance(node_pattern, Pattern):
+            node_pattern = Pattern(node_pattern)
+        if node_pattern.root_key is None:
+            candidates = eclasses.keys()
+        else:
+            candidates = self._eclasses_with_key(node_pattern.root_key)
+        if dirty is not None:
+            nearby = self._ancestors(dirty, node_pattern.depth)
+            candidates = [eclass_id for eclass_id in candidates if eclass_id in nearby]
         list_of_matches = []
-        for eclass_id in eclasses.keys():
-            is_a_match, environment = _match_in(node_pattern, eclass_id, {})
-            if is_a_match:
+        for eclass_id in candidates:
+            for environment in node_pattern.match(self, eclasses, eclass_id, dirty):
                 list_of_matches.append((eclass_id, environment))
         return list_of_matches
 
-    def _substitute(self, ast_node, environment):
+    def _substitute(self, ast_node, environment, memo=None):
         """Extends the E-Graph with a substitution.
 
+        The pattern is either a compiled ``Pattern`` (see Pattern.py) or the
+        root ASTNode of a pattern, which is compiled on the fly. The optional
+        memo is passed on to ``Pattern.instantiate``.
+
         (DISCLAIMER)
         This method is based on work of Zachary DeVito. For more information,
         please see the implementation section in the module's docstring.
         """
-        if (
-            ast_node.left is None
-            and ast_node.right is None
-            and not re.match("[0-9]+", ast_node.key)
-            and ast_node.key in environment.keys()
-        ):
-            return environment[ast_node.key]
-        else:
-            if ast_node.left is None and ast_node.right is None:
-                enode = ENode(
-                    ast_node.key,
-                    [],
-                )
-            elif ast_node.left is None:
-                enode = ENode(
-                    ast_node.key,
-                    [self._substitute(ast_node.right, environment)],
-                )
-            elif ast_node.right is None:
-                enode = ENode(
-                    ast_node.key,
-                    [self._substitute(ast_node.left, environment)],
-                )
-            else:
-                enode = ENode(
-                    ast_node.key,
-                    [
-                        self._substitute(ast_node.left, environment),
-                        self._substitute(ast_node.right, environment),
-                    ],
-                )
-            return self._add(enode)
+        if not isinstance(ast_node, Pattern):
+            ast_node = Pattern(ast_node)
+        return ast_node.instantiate(self, environment, memo)
 
     def get_eclasses(self):
-        """Returns a dictionary with a mapping of E-Classes to their E-Nodes.
+        """Returns a read-only mapping of E-Classes to their E-Nodes.
+
+        The mapping is a view of the E-Graph, which keeps it up to date on
+        every merge and rebuild. Pending merges are rebuilt first, so that
+        all EClass-IDs and E-Nodes are canonical. The sets of E-Nodes must not
+        be modified.
 
         (DISCLAIMER)
         This method is based on work of Zachary DeVito. For more information,
         please see the implementation section in the module's docstring.
-        :return: dict with {eclass -> set(enode, ...)}
+        :return: mapping with {canonical EClass-ID -> set(enode, ...)}
         """
-        eclasses = {}
-        eclasses_raw = set(self.m.values())
-        for cl in eclasses_raw:
-            eid = self._find(cl.id)
-            if eid not in eclasses:
-                eclasses[eid] = set(cl.nodes)
-            else:
-                for xx in set(cl.nodes):
-                    xx.arguments = [self._find(arg) for arg in xx.arguments]
-                    eclasses[eid].add(xx)
-
-        return eclasses
-
-    def _cost_model(self, key):
-        """Returns the cost of a key (integer) based on a simple cost model."""
-        costs = {"+": 1, "*": 2, "-": 1, "/": 3, "<<": 1, ">>": 1}
-        if key not in costs.keys():
-            return 0
-        return costs[key]
-
-    def _preorder(self, ast_node):
-        """Traverses the tree (preorder) to create string representation."""
-        if len(ast_node.arguments) == 2:
-            self.str_repr += "(" + str(ast_node.key) + " "
-            self._preorder(ast_node.arguments[0])
-            self._preorder(ast_node.arguments[1])
-            self.str_repr = self.str_repr.strip()
-            self.str_repr += ") "
-        else:
-            self.str_repr += ast_node.key + " "
-
-    def egraph_to_dot(self, nodesep=0.5, ranksep=0.5, marked_eclasses = []):
-        """Returns a string of the E-Graph in DOT notation."""
-        dot_commands = [
-            "digraph parent { graph [compound=true, nodesep=" + str(nodesep)
-            + ", ranksep=" + str(ranksep) + "]\n" + """node [fillcolor=white 
-            fontname=\"Times-Bold\" fontsize=20 shape=record style=\"rounded, filled\"]\n"""
-        ]
-        node_set = set()
-        node_identifier = 0
-        for subset in self.u.subsets():
-            fillcolor = 'fillcolor=\"navajowhite\"'
-            eclass_id_subset = str(self._find(next(iter(subset))))
-            if eclass_id_subset in marked_eclasses:
-                fillcolor = 'fillcolor=\"crimson\"'
-            dot_commands.append(
-                'subgraph \"cluster-' + eclass_id_subset
-                + '\" { graph [compound=true '
-                + fillcolor
-                + ' style="dashed, rounded, filled"]\n'
+        if self.pending or self.analysis_pending:
+            self.rebuild()
+        return self._eclasses_view
+
+    def egraph_to_dot(
+        self, nodesep=0.5, ranksep=0.5, marked_eclasses = [], hops=None,
+        max_class_size=None, max_nodes=None,
+    ):
+        """Returns a string of the E-Graph in DOT notation (see Dot.py).
+
+        Large E-Graphs can be reduced to the E-Classes within hops of the
+        marked E-Classes (or of the roots), E-Classes with more than
+        max_class_size E-Nodes collapsed and at most max_nodes nodes.
+        The strings are cached by the revision of the E-Graph, the (canonical)
+        marked E-Classes and the options.
+        """
+        cache = self._current_render_cache()
+        key = (
+            "dot",
+            nodesep,
+            ranksep,
+            frozenset(self._find(i) for i in marked_eclasses),
+            tuple(self._find(root) for root in self.roots),
+            hops,
+            max_class_size,
+            max_nodes,
+        )
+        if key not in cache:
+            cache[key] = eclasses_to_dot(
+                self.classes, self._find, nodesep, ranksep, marked_eclasses,
+                self.roots, hops, max_class_size, max_nodes,
             )
-            nodes_in_subset = set()
-
-            for eclass_id in subset:
-                for n in self.m[eclass_id].nodes:
-                    nodes_in_subset.add(n)
-
-            for enode in nodes_in_subset:
-                fillcol = ', fillcolor=\"white\"'
-                differentiator = ""
-                if enode.key in ("/", "*", "+", "-", "<<", ">>"):
-                    differentiator = str(node_identifier)
-                node_set.add(
-                    (str(self._find(next(iter(subset)))), node_identifier, enode)
-                )
-                second_diff = enode.key
-                if enode.key in ('<<', '>>'):
-                    second_diff = enode.key[0] + '\\' + enode.key[1]
-                dot_commands.append(
-                    '"' + enode.key + differentiator + '"'
-                    + '[label="<' + str(node_identifier) + "0> | \\"
-                    + second_diff + " | <" + str(node_identifier) + '1>" '
-                    + fillcol + ']\n'
-                )
-                node_identifier += 1
-            dot_commands.append("}\n")
-
-        d = str(uuid.uuid4())
-        for ecl_id, node_ident, enode in node_set:
-            if enode.arguments:
-                differentiator = ""
-                differentiator_arg0 = ""
-                differentiator_arg1 = ""
-                enode_arg0, enode_arg1 = enode.arguments
-                if enode.key in ("/", "*", "+", "-", "<<", ">>"):
-                    differentiator = str(node_ident)
-
-                k0 = next(iter(self.m[enode_arg0].nodes))
-                k1 = next(iter(self.m[enode_arg1].nodes))
-
-                if k0.key in ("/", "*", "+", "-", "<<", ">>",):
-                    for eid, nodeid, nodeself in node_set:
-                        if k0.key == nodeself.key and eid == str(
-                            self._find(enode_arg0)
-                        ):
-                            differentiator_arg0 = str(nodeid)
-
-                if k1.key in ("/", "*", "+", "-", "<<", ">>",):
-                    for eid, nodeid, nodeself in node_set:
-                        if k1.key == nodeself.key and eid == str(
-                            self._find(enode_arg1)
-                        ):
-                            differentiator_arg1 = str(nodeid)
-
-                if self._find(enode_arg0) == ecl_id:
-                    dot_commands.append(
-                        '"' + d + '" [height=0, width=0, shape=point]\n'
-                        '"' + enode.key + differentiator + '":' + str(node_ident)
-                        + '0 -> "' + d + '" [dir=none]\n'
-                        + '"' + d + '" -> "'
-                        + str(k0.key) + differentiator_arg0 + '" [lhead='
-                        + '"cluster-' + str(self._find(enode_arg0)) + '"' + "]\n"
-                    )
-                    d = str(uuid.uuid4())
-                else:
-                    dot_commands.append(
-                        '"' + enode.key + differentiator + '":' + str(node_ident)
-                        + '0 -> "' + str(k0.key) + differentiator_arg0 + '" [lhead='
-                        + '"cluster-' + str(self._find(enode_arg0)) + '"' + "]\n"
-                    )
+        return cache[key]
 
-                if self._find(enode_arg1) == ecl_id:
-                    dot_commands.append(
-                        '"' + d + '" [height=0, width=0, shape=point]\n'
-                        '"' + enode.key + differentiator + '":' + str(node_ident)
-                        + '0 -> "' + d + '" [dir=none]\n'
-                        + '"' + d + '" -> "'
-                        + str(k1.key) + differentiator_arg1 + '" [lhead='
-                        + '"cluster-' + str(self._find(enode_arg1)) + '"' + "]\n"
-                    )
-                    d = str(uuid.uuid4())
-                else:
-                    dot_commands.append(
-                        '"' + enode.key + differentiator + '":' + str(node_ident)
-                        + '1 -> "' + str(k1.key) + differentiator_arg1 + '" [lhead='
-                        + '"cluster-' + str(self._find(enode_arg1)) + '"' + "]\n"
-                    )
-        dot_commands.append("}")
-        return "".join(dot_commands)
+    def egraph_to_json(self, marked_eclasses=()):
+        """Returns a JSON serialisable dictionary of the E-Graph (see
+        GraphJson.py). It is cached like ``egraph_to_dot`` and must not be
+        modified.
+        """
+        cache = self._current_render_cache()
+        key = (
+            "json",
+            frozenset(self._find(i) for i in marked_eclasses),
+            tuple(self._find(root) for root in self.roots),
+        )
+        if key not in cache:
+            cache[key] = eclasses_to_json(
+                self.classes, self._find, marked_eclasses, self.roots
+            )
+        return cache[key]
+
+    def _current_render_cache(self):
+        """Returns the cache of rendered strings for the current revision."""
+        revision, cache = self._render_cache
+        if revision != self.revision:
+            cache = {}
+            self._render_cache = (self.revision, cache)
+        return cache
 
 
 def export_egraph_to_file(egraph, filepath, extension="pdf"):
@@ -451,136 +582,374 @@ def export_egraph_to_file(egraph, filepath, extension="pdf"):
     return True, "Export was successful. " + filepath
 
 
-def equality_saturation(rules, eterm_id, egraph):
-    """Performs equality saturation.
+def run_equality_saturation(
+    rules, eterm_id, egraph, scheduler=None, limits=None, extract=True,
+    cost_function=None, trace=TRACE_EVENTS,
+):
+    """Performs equality saturation and returns a report of the run.
 
-    (DISCLAIMER)
-    This method is based on work of Zachary DeVito. For more information,
-    please see the implementation section in the module's docstring.
-    """
-    debug_information = []
-    best_term = ""
-    old_term = best_term
-    if not egraph.is_saturated:
-        debug_information.append(["Cost model: ['+'|'-'|'<<'|'>>']: 1, ['*']: 2, ['/']: 3, [other]: 0", egraph.egraph_to_dot()])
-        while True:
-            best_term = _extract_term(eterm_id, egraph)
-            if old_term == best_term:
-                break
-            old_term = best_term
-            debug_information.append(["Best Term: " + best_term, egraph.egraph_to_dot()])
-            egraph, debug_output = apply_rules(rules, egraph)
-            for debug_info in debug_output:
-                debug_information.append(debug_info)
-           
-    return egraph, debug_information, best_term
+    The scheduler (see Scheduler.py) decides which rules are applied in each
+    iteration. By default, every rule is applied in every iteration. The
+    limits (see Runner.py) are checked in every iteration and between rule
+    applications.
 
+    :param rules: List of rewrite rules.
+    :param eterm_id: EClass-ID of the term to extract.
+    :param egraph: The E-Graph.
+    :param scheduler: Scheduler, defaults to ``Scheduler()``.
+    :param limits: RunnerLimits, defaults to ``RunnerLimits()``.
+    :param extract: If True, the best term is extracted once at the end.
+    :param cost_function: CostFunction (see CostFunction.py) used for the
+        extraction, defaults to ``OperatorWeights()``.
+    :param trace: TRACE_OFF, TRACE_EVENTS or TRACE_FULL (see Trace.py).
+    :return: egraph, debug information (list of TraceEvents), RunnerReport
 
-def equality_saturation_no_extract(rules, eterm_id, egraph):
-    """Performs equality saturation without extraction.
+    The E-Graph is saturated, once an iteration neither adds an E-Node nor
+    merges two E-Classes (and the scheduler allows to stop).
 
     (DISCLAIMER)
     This method is based on work of Zachary DeVito. For more information,
     please see the implementation section in the module's docstring.
     """
+    if trace not in TRACE_MODES:
+        raise ValueError("trace must be one of " + ", ".join(TRACE_MODES) + ".")
+    if scheduler is None:
+        scheduler = Scheduler()
+    if limits is None:
+        limits = RunnerLimits()
+    start_time = time.perf_counter()
     debug_information = []
-    best_term = ""
-    old_term = best_term
+    best_term = None
+    iteration = 0
+    stop_reason = SATURATED
     if not egraph.is_saturated:
+        if extract:
+            if cost_function is None:
+                cost_function = OperatorWeights()
+            record(debug_information, egraph, trace, "Cost model: " + str(cost_function))
         while True:
-            best_term = _extract_term(eterm_id, egraph)
-            if old_term == best_term:
+            stop_reason = limits.check(egraph, iteration, start_time)
+            if stop_reason is not None:
                 break
-            old_term = best_term
-            egraph, debug_output = apply_rules(rules, egraph)
+            enodes_added = egraph.enodes_added
+            unions_performed = egraph.unions_performed
+            egraph, debug_output = apply_rules(
+                rules,
+                egraph,
+                incremental=True,
+                scheduler=scheduler,
+                iteration=iteration,
+                limits=limits,
+                start_time=start_time,
+                trace=trace,
+            )
+            iteration += 1
             for debug_info in debug_output:
                 debug_information.append(debug_info)
-            
+            if (
+                enodes_added == egraph.enodes_added
+                and unions_performed == egraph.unions_performed
+                and scheduler.can_stop(iteration)
+            ):
+                stop_reason = SATURATED
+                break
+    if extract:
+        best_term = _extract_term(eterm_id, egraph, cost_function)
+        record(debug_information, egraph, trace, "Best Term: " + best_term)
+
+    report = RunnerReport(
+        stop_reason,
+        iteration,
+        egraph.number_of_enodes(),
+        egraph.number_of_eclasses(),
+        time.perf_counter() - start_time,
+        best_term,
+    )
+    return egraph, debug_information, report
+
+
+def equality_saturation(
+    rules, eterm_id, egraph, scheduler=None, limits=None, cost_function=None,
+    trace=TRACE_EVENTS,
+):
+    """Performs equality saturation and extracts the best term.
+
+    See ``run_equality_saturation`` for the parameters.
+
+    :return: egraph, debug information, best term
+    """
+    egraph, debug_information, report = run_equality_saturation(
+        rules,
+        eterm_id,
+        egraph,
+        scheduler=scheduler,
+        limits=limits,
+        cost_function=cost_function,
+        trace=trace,
+    )
+    return egraph, debug_information, report.best_term
+
+
+def equality_saturation_no_extract(
+    rules, eterm_id, egraph, scheduler=None, limits=None, trace=TRACE_EVENTS
+):
+    """Performs equality saturation without extraction.
+
+    See ``run_equality_saturation`` for the parameters.
+
+    :return: egraph, debug information
+    """
+    egraph, debug_information, report = run_equality_saturation(
+        rules, eterm_id, egraph, scheduler=scheduler, limits=limits, extract=False,
+        trace=trace,
+    )
     return egraph, debug_information
 
 
-def apply_rules(rules, egraph):
+def apply_rules(
+    rules,
+    egraph,
+    incremental=False,
+    scheduler=None,
+    iteration=0,
+    limits=None,
+    start_time=None,
+    trace=TRACE_EVENTS,
+):
     """Apply multiple rules to the E-Graph.
 
+    If incremental is True, a rule that was searched before only reports
+    matches touching E-Classes that were created or merged since then.
+    If a scheduler is given, it decides for the given iteration which rules
+    are searched and whether their matches are applied.
+    If limits are given (see Runner.py), they are checked between rule
+    applications. Once a limit is exceeded, the remaining matches are dropped.
+    Matches that do not fulfil the condition of their rule are dropped right
+    after the search. Rules with an applier call it instead of instantiating
+    the right side (see RewriteRule.py).
+    Matches of the same rule with the same canonical E-Classes that were
+    applied before are skipped. Right sides are instantiated through a memo
+    shared by all matches of this call, so identical subterms with identical
+    bindings are only built once.
+    The steps are recorded as TraceEvents depending on the trace mode (see
+    Trace.py). Only TRACE_FULL keeps snapshots to render them in DOT notation.
+
     (DISCLAIMER)
     This method is based on work of Zachary DeVito. For more information,
     please see the implementation section in the module's docstring.
     """
+    if trace not in TRACE_MODES:
+        raise ValueError("trace must be one of " + ", ".join(TRACE_MODES) + ".")
+    tracing = trace != TRACE_OFF
     debug_info = []
     eclasses = egraph.get_eclasses()
+    version = egraph.current_version()
     list_of_matches = []
+    if scheduler is None:
+        scheduler = Scheduler()
+    if start_time is None:
+        start_time = time.perf_counter()
     for rule in rules:
-        if not egraph._ematch(eclasses, rule.expr_lhs.root_node):
-            debug_info.append(["No MATCH for rule: " + str(rule), egraph.egraph_to_dot()])
+        if limits is not None and limits.check(egraph, iteration, start_time):
+            break
+        if not scheduler.can_search(iteration, rule):
+            record(debug_info, egraph, trace, "Rule " + str(rule.name) + " is banned.", rule.name)
+            continue
+        dirty = None
+        if incremental and rule in egraph.search_versions:
+            dirty = egraph.dirty_since(egraph.search_versions[rule])
+        matches = egraph._ematch(eclasses, rule.lhs_pattern, dirty)
+        if rule.condition is not None:
+            matches = [
+                (eclass_id, environment)
+                for eclass_id, environment in matches
+                if rule.condition(egraph, eclass_id, environment)
+            ]
+        if not scheduler.accept_matches(iteration, rule, matches):
+            record(
+                debug_info, egraph, trace,
+                "Rule " + str(rule.name) + " has too many matches, banned.", rule.name,
+            )
+            continue
+        egraph.search_versions[rule] = version
+        if not matches:
+            record(debug_info, egraph, trace, "No MATCH for rule: " + str(rule), rule.name)
         else:
-            for eclass_id, environment in egraph._ematch(eclasses, rule.expr_lhs.root_node):
+            for eclass_id, environment in matches:
                 if environment:
                     list_of_matches.append((rule, eclass_id, environment))
+    memo = {}
     for rule, eclass_id, environment in list_of_matches:
-        new_eclass_id = egraph._substitute(rule.expr_rhs.root_node, environment)
+        stop_reason = None if limits is None else limits.check(egraph, iteration, start_time)
+        if stop_reason is not None:
+            # The dropped matches have to be found again by the next search.
+            egraph.search_versions.clear()
+            record(debug_info, egraph, trace, "Stopped applying rules: " + stop_reason + ".")
+            break
+        if rule.applier is not None:
+            new_eclass_id = rule.applier(egraph, eclass_id, environment)
+            if new_eclass_id is None:
+                continue
+        else:
+            applied_match = (
+                rule,
+                egraph._find(eclass_id),
+                tuple(egraph._find(environment[v]) for v in rule.lhs_pattern.variables),
+            )
+            if applied_match in egraph.applied_matches:
+                continue
+            egraph.applied_matches.add(applied_match)
+            new_eclass_id = egraph._substitute(rule.rhs_pattern, environment, memo)
+        if not tracing:
+            egraph.merge(eclass_id, new_eclass_id)
+            continue
         if eclass_id != new_eclass_id:
-            debug_info.append(
-                [
-                    "Rule " + str(rule.name) + ": MATCHED EClass with " + str(environment) + ".",
-                    egraph.egraph_to_dot(marked_eclasses=[eclass_id]),
-                ]
+            record(
+                debug_info, egraph, trace,
+                "Rule " + str(rule.name) + ": MATCHED EClass with " + str(environment) + ".",
+                rule.name, [eclass_id], environment,
             )
-        debug_info.append(
-            [
-                "Rule " + str(rule.name) + ": MERGE colored eclasses.",
-                egraph.egraph_to_dot(marked_eclasses=[eclass_id, new_eclass_id]),
-            ]
+        record(
+            debug_info, egraph, trace,
+            "Rule " + str(rule.name) + ": MERGE colored eclasses.",
+            rule.name, [eclass_id, new_eclass_id], environment,
         )
         egraph.merge(eclass_id, new_eclass_id)
-        debug_info.append(["Rule " + str(rule.name) + ": MERGED.", egraph.egraph_to_dot()])
+        record(debug_info, egraph, trace, "Rule " + str(rule.name) + ": MERGED.", rule.name)
     if egraph.pending:
-        debug_info.append(
-            [
-                "REBUILD colored eclasses.",
-                egraph.egraph_to_dot(marked_eclasses=egraph.pending),
-            ]
-        )
+        record(debug_info, egraph, trace, "REBUILD colored eclasses.", eclass_ids=egraph.pending)
         egraph.rebuild()
-        debug_info.append(["EGraph was rebuilt.", egraph.egraph_to_dot()])
-    debug_info.append(["Done.", egraph.egraph_to_dot()])
+        record(debug_info, egraph, trace, "EGraph was rebuilt.")
+    record(debug_info, egraph, trace, "Done.")
     egraph.is_saturated = False
     return egraph, debug_info
 
 
-def _extract_term(eterm_id, egraph):
-    """Extracts the best term from the E-Graph based on a simple cost model.
+def _term_to_string(eclass_id, costs, egraph, names=None):
+    """Returns the string (prefix-notation) of the best term of an E-Class.
+
+    E-Classes in names (EClass-ID -> name) are printed as their name, except
+    for the E-Class itself.
+    """
+    tokens = []
+    stack = [eclass_id]
+    first = True
+    while stack:
+        eclass_id = stack.pop()
+        if eclass_id is None:
+            tokens.append(")")
+            continue
+        eclass_id = egraph._find(eclass_id)
+        if names and eclass_id in names and not first:
+            tokens.append(names[eclass_id])
+            continue
+        first = False
+        enode = costs[eclass_id][1]
+        if enode.arguments:
+            tokens.append("(" + enode.key)
+            stack.append(None)
+            stack.extend(reversed(enode.arguments))
+        else:
+            tokens.append(enode.key)
+    return " ".join(tokens).replace(" )", ")")
+
+
+def _shared_eclasses(eclass_ids, costs, egraph):
+    """Returns the E-Classes (children first) whose best term is not a leaf
+    and is used more than once by the best terms of the given E-Classes.
+    """
+    uses = {}
+    order = []
+    stack = [(egraph._find(eclass_id), False) for eclass_id in reversed(eclass_ids)]
+    while stack:
+        eclass_id, expanded = stack.pop()
+        if expanded:
+            order.append(eclass_id)
+            continue
+        uses[eclass_id] = uses.get(eclass_id, 0) + 1
+        if uses[eclass_id] > 1:
+            continue
+        stack.append((eclass_id, True))
+        for child in reversed(costs[eclass_id][1].arguments):
+            stack.append((egraph._find(child), False))
+    return [
+        eclass_id
+        for eclass_id in order
+        if uses[eclass_id] > 1 and costs[eclass_id][1].arguments
+    ]
+
+
+def _extract_term(eterm_id, egraph, cost_function=None):
+    """Extracts the best term from the E-Graph based on a cost function.
+
+    :param eterm_id: EClass-ID of the term.
+    :param egraph: The E-Graph.
+    :param cost_function: CostFunction (see CostFunction.py), defaults to
+        ``OperatorWeights()``.
+    :return: The best term (prefix-notation).
 
     (DISCLAIMER)
     This method is based on work of Zachary DeVito. For more information,
     please see the implementation section in the module's docstring.
     """
-    eterm_id = egraph._find(eterm_id)
-    eclasses = egraph.get_eclasses()
-    has_changed = True
-    costs = {eclass: (math.inf, None) for eclass in eclasses.keys()}
+    costs = egraph.extraction.update(egraph, cost_function)
+    return _term_to_string(egraph._find(eterm_id), costs, egraph)
 
-    def cost_for_enode(enode):
-        return egraph._cost_model(enode.key) + sum(
-            costs[egraph._find(eclass_id)][0] for eclass_id in enode.arguments
-        )
 
-    while has_changed:
-        has_changed = False
-        for eclass, enodes in eclasses.items():
-            costs_to_enodes = [(cost_for_enode(enode), enode) for enode in enodes]
-            costs_to_enodes.sort(key=lambda student: student[0])
-            new_cost = min(costs_to_enodes, key=lambda st: st[0])
+def _extract_terms(eterm_ids, egraph, cost_function=None, share=False):
+    """Extracts the best terms of several E-Classes from one cost computation.
 
-            if costs[eclass][0] != new_cost[0]:
-                has_changed = True
-            costs[eclass] = new_cost
+    :param eterm_ids: EClass-IDs of the terms, e.g. ``egraph.roots``.
+    :param egraph: The E-Graph.
+    :param cost_function: CostFunction (see CostFunction.py), defaults to
+        ``OperatorWeights()``.
+    :param share: If True, subterms used more than once are printed once as
+        a binding and referenced by name ($0, $1, ...) everywhere else.
+    :return: list of best terms, list of bindings [(name, term), ...]
+    """
+    costs = egraph.extraction.update(egraph, cost_function)
+    return _terms_to_strings(eterm_ids, costs, egraph, share)
 
-    def extract_best_term(eclass_id):
-        eclass_id = egraph._find(eclass_id)
-        enode = costs[eclass_id][1]
-        return ENode(enode.key, [extract_best_term(eid) for eid in enode.arguments])
 
-    egraph.str_repr = ""
-    egraph._preorder(extract_best_term(eterm_id))
-    egraph.str_repr = egraph.str_repr.strip()
-    return egraph.str_repr
+def _terms_to_strings(eterm_ids, costs, egraph, share):
+    """Returns the strings of the selected terms and, if share is True, the
+    bindings of their shared subterms (see ``_extract_terms``).
+    """
+    names = {}
+    bindings = []
+    if share:
+        for number, eclass_id in enumerate(_shared_eclasses(eterm_ids, costs, egraph)):
+            names[eclass_id] = "$" + str(number)
+            bindings.append(
+                (names[eclass_id], _term_to_string(eclass_id, costs, egraph, names))
+            )
+    terms = []
+    for eterm_id in eterm_ids:
+        eterm_id = egraph._find(eterm_id)
+        if eterm_id in names:
+            terms.append(names[eterm_id])
+        else:
+            terms.append(_term_to_string(eterm_id, costs, egraph, names))
+    return terms, bindings
+
+
+def _extract_dag(eterm_ids, egraph, cost_function=None, mode=DAG_GREEDY, node_budget=10000):
+    """Extracts the best terms of several E-Classes as one DAG, in which
+    every shared E-Class is paid only once (see ``extract_dag`` in
+    Extraction.py).
+
+    :param eterm_ids: EClass-IDs of the terms, e.g. ``egraph.roots``.
+    :param egraph: The E-Graph.
+    :param cost_function: CostFunction that combines by sum, defaults to
+        ``OperatorWeights()``.
+    :param mode: DAG_GREEDY or DAG_EXACT (branch-and-bound).
+    :param node_budget: Maximum number of search nodes for DAG_EXACT.
+    :return: cost, list of terms, list of bindings [(name, term), ...],
+        optimal (True if the exact search finished within the node budget)
+    """
+    cost, choices, optimal = extract_dag(
+        egraph, eterm_ids, cost_function, mode, node_budget
+    )
+    selected = {eclass_id: (None, enode) for eclass_id, enode in choices.items()}
+    terms, bindings = _terms_to_strings(eterm_ids, selected, egraph, True)
+    return cost, terms, bindings, optimal
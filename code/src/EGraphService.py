@@ -4,13 +4,18 @@ Classes:
     EGraphService
 
     Methods:
-        - create_egraph(expr)
+        - create_egraph(expr, analysis=None)
         - get_current_egraph()
-        - extract()
-        - export(extension_format)
+        - get_current_egraph_json()
+        - extract(limits=None, cost_function=None)
+        - extract_top_k(k, cost_function=None)
+        - add_root_expression(expression)
+        - extract_all(limits=None, cost_function=None, share=False, dag=None)
+        - compact(prune=False)
+        - export(extension_format, hops=None, max_class_size=None, max_nodes=None)
         - get_all_rules()
-        - add_rule(lhs, rhs)
-        - apply_all_rules_randomly()
+        - add_rule(lhs, rhs, condition=None, bidirectional=True)
+        - apply_all_rules(limits=None)
         - apply(rules)
         - save_rewrite_rules_to_file()
         - add_rewrite_rules_from_file(data)
@@ -24,6 +29,11 @@ Classes:
 
 Functions:
     is_valid_expression
+
+Implementation:
+    Conditions of rewrite rules (see RewriteRule.py) are callables, which
+    cannot be stored in JSON. Thus, rules with a condition are not saved in
+    rule files and session snapshots, only unconditional rules are.
 """
 
 import os
@@ -33,11 +43,18 @@ from EGraph import (
     EGraph,
     apply_rules,
     export_egraph_to_file,
-    equality_saturation,
-    equality_saturation_no_extract, _extract_term,
+    run_equality_saturation,
+    _extract_term,
+    _extract_terms,
+    _extract_dag,
 )
+from Extraction import DAG_EXACT, DAG_GREEDY, extract_top_k
+from Runner import SATURATED
 from RewriteRule import RewriteRule
+from Scheduler import BackoffScheduler
+from Trace import TRACE_FULL, record
 from AbstractSyntaxTree import AbstractSyntaxTree
+from DebugHistory import DebugHistory
 
 
 def is_valid_expression(expression):
@@ -62,6 +79,21 @@ def is_valid_expression(expression):
     )
 
 
+def _rule_identity(lhs, rhs, condition=None):
+    """Returns the string that identifies a rewrite rule in the service. Two
+    rules with the same sides but different conditions are different rules.
+
+    :param lhs: str, left-hand side of rewrite rule
+    :param rhs: str, right-hand side of rewrite rule
+    :param condition: condition of the rule or None
+    :return: str
+    """
+    identity = lhs + " => " + rhs
+    if condition is not None:
+        identity += " if " + getattr(condition, "__name__", "condition")
+    return identity
+
+
 class EGraphService:
     """Class that represents the EGraphService.
 
@@ -71,7 +103,8 @@ class EGraphService:
         - applied_rules: List of applied rules
         - egraph: current E-Graph
         - expr: The expression to the corresponding E-Graph
-        - egraphs: List with debug strings
+        - egraphs: DebugHistory with lists of TraceEvents (see
+          DebugHistory.py), which render their DOT string when requested
         - current_major: pointer
         - current_minor: pointer
     """
@@ -86,71 +119,228 @@ class EGraphService:
         self.applied_rules = set()
         self.egraph = None
         self.expr = None
-        self.egraphs = [[]]
+        self.egraphs = DebugHistory()
         self.current_major = 0
         self.current_minor = 0
 
-    def create_egraph(self, expression):
+    def create_egraph(self, expression, analysis=None):
         """Creates an e-graph thereby clearing all previously made settings.
 
         :param expression: mathematical expression, prefix notation
+        :param analysis: E-Class analysis (see Analysis.py), e.g.
+            ConstantFolding(), defaults to no analysis
         :return: Boolean, str (if action is successful, status msg)
         """
         if not is_valid_expression(expression):
             return False, "Invalid expression."
-        eg = EGraph()
-        eterm_id = eg.add_node(AbstractSyntaxTree(expression).root_node)
+        eg = EGraph(analysis)
+        eterm_id = eg.add_root(eg.add_node(AbstractSyntaxTree(expression).root_node))
         self.egraph = (eg, eterm_id)
         self.expr = expression
-        self.egraphs = [[]]
+        self.egraphs = DebugHistory()
         self.current_major = 0
         self.current_minor = 0
-        self.egraphs[self.current_major].append(["EGraph created.", eg.egraph_to_dot()])
+        record(self.egraphs[self.current_major], eg, TRACE_FULL, "EGraph created.")
         self.rrc = 0
         self.dict_of_rules = {}
         return True, "Created EGraph."
 
     def get_current_egraph(self):
         """Returns the egraph that is currently selected by the minor and
-        major pointers.
+        major pointers. It is reconstructed and rendered in DOT notation on
+        request (see DebugHistory.py).
 
-        :return: String representation of the E-Graph in DOT format.
+        :return: bool, str, (message, DOT string of the E-Graph)
         """
-        if self.egraphs == [[]]:
+        if self.egraphs.is_empty():
             return False, "No EGraph there.", (None, None)
         else:
             return (
                 True,
                 "EGraph loaded.",
-                self.egraphs[self.current_major][self.current_minor],
+                (
+                    self.egraphs[self.current_major][self.current_minor][0],
+                    self.egraphs.dot(self.current_major, self.current_minor),
+                ),
             )
 
-    def extract(self):
+    def get_current_egraph_json(self):
+        """Returns the egraph that is currently selected by the minor and
+        major pointers as JSON object (see GraphJson.py) instead of DOT.
+
+        :return: bool, str, (message, E-Graph as dict)
+        """
+        if self.egraphs.is_empty():
+            return False, "No EGraph there.", (None, None)
+        return (
+            True,
+            "EGraph loaded.",
+            (
+                self.egraphs[self.current_major][self.current_minor][0],
+                self.egraphs.json(self.current_major, self.current_minor),
+            ),
+        )
+
+    def extract(self, limits=None, cost_function=None):
         """Performs equality saturation and extracts best term.
 
+        :param limits: RunnerLimits (see Runner.py), defaults to RunnerLimits()
+        :param cost_function: CostFunction (see CostFunction.py), defaults to
+            OperatorWeights()
         :return: bool, str, str (if action is successful, status msg, best term)
         """
-        egraph, debug_information, best_term = equality_saturation(
-            list(self.dict_of_rules.values()), self.egraph[1], self.egraph[0]
+        egraph, debug_information, report = run_equality_saturation(
+            list(self.dict_of_rules.values()),
+            self.egraph[1],
+            self.egraph[0],
+            scheduler=BackoffScheduler(),
+            limits=limits,
+            cost_function=cost_function,
+            trace=TRACE_FULL,
         )
         self.egraphs.append(debug_information)
         self.egraph = (egraph, self.egraph[1])
 
         return (
             True,
-            "Extracted best term. Use debug (>) output to watch extraction.",
-            best_term,
+            "Extracted best term. Use debug (>) output to watch extraction. "
+            + str(report),
+            report.best_term,
         )
 
-    def export(self, extension_format):
+    def extract_top_k(self, k, cost_function=None):
+        """Extracts the k best terms from the current E-Graph.
+
+        :param k: Maximum number of terms.
+        :param cost_function: CostFunction (see CostFunction.py), defaults to
+            OperatorWeights()
+        :return: bool, str, list (if action is successful, status msg,
+            list of [term, cost] sorted by cost)
+        """
+        if self.egraph is None:
+            return False, "No EGraph there.", []
+        if k < 1:
+            return False, "k must be at least 1.", []
+        terms = extract_top_k(self.egraph[0], self.egraph[1], k, cost_function)
+        return (
+            True,
+            "Extracted " + str(len(terms)) + " best term(s).",
+            [[term, cost] for cost, term in terms],
+        )
+
+    def add_root_expression(self, expression):
+        """Adds another expression to the current E-Graph and registers it as
+        root for ``extract_all``.
+
+        :param expression: mathematical expression, prefix notation
+        :return: Boolean, str (if action is successful, status msg)
+        """
+        if self.egraph is None:
+            return False, "No EGraph there."
+        if not is_valid_expression(expression):
+            return False, "Invalid expression."
+        egraph = self.egraph[0]
+        egraph.add_root(egraph.add_node(AbstractSyntaxTree(expression).root_node))
+        egraph.is_saturated = False
+        self._record_step("Added root " + expression + ".")
+        return True, "Added root."
+
+    def _record_step(self, message):
+        """Records the current E-Graph as new major step at the end of the
+        debug history and moves the pointers to it, so the history stays in
+        time order even if an older step is selected.
+
+        :param message: Description of the step.
+        :return: None
+        """
+        events = []
+        record(events, self.egraph[0], TRACE_FULL, message)
+        self.egraphs.append(events)
+        self.current_major = len(self.egraphs) - 1
+        self.current_minor = 0
+
+    def extract_all(self, limits=None, cost_function=None, share=False, dag=None):
+        """Performs equality saturation once and extracts the best terms of
+        all roots.
+
+        :param limits: RunnerLimits (see Runner.py), defaults to RunnerLimits()
+        :param cost_function: CostFunction (see CostFunction.py), defaults to
+            OperatorWeights()
+        :param share: If True, shared subterms are printed once as bindings.
+        :param dag: None (tree costs) or a DAG extraction mode (DAG_GREEDY or
+            DAG_EXACT, see Extraction.py), which pays shared subterms once and
+            always prints them as bindings.
+        :return: bool, str, dict (if action is successful, status msg,
+            {'terms': [...], 'bindings': [[name, term], ...]})
+        """
+        if self.egraph is None:
+            return False, "No EGraph there.", {"terms": [], "bindings": []}
+        egraph, debug_information, report = run_equality_saturation(
+            list(self.dict_of_rules.values()),
+            self.egraph[1],
+            self.egraph[0],
+            scheduler=BackoffScheduler(),
+            limits=limits,
+            extract=False,
+            trace=TRACE_FULL,
+        )
+        if dag is None:
+            terms, bindings = _extract_terms(egraph.roots, egraph, cost_function, share)
+        else:
+            _, terms, bindings, _ = _extract_dag(egraph.roots, egraph, cost_function, dag)
+        record(debug_information, egraph, TRACE_FULL, "Best Terms: " + ", ".join(terms))
+        self.egraphs.append(debug_information)
+        self.egraph = (egraph, self.egraph[1])
+        return (
+            True,
+            "Extracted best terms of " + str(len(terms)) + " root(s). " + str(report),
+            {"terms": terms, "bindings": [list(binding) for binding in bindings]},
+        )
+
+    def compact(self, prune=False):
+        """Compacts the current E-Graph (see ``EGraph.compact``).
+
+        :param prune: If True, E-Classes unreachable from the roots are dropped.
+        :return: bool, str (if action is successful, status msg)
+        """
+        if self.egraph is None:
+            return False, "No EGraph there."
+        egraph, eterm_id = self.egraph
+        eterm_id = egraph._find(eterm_id)
+        before = egraph.number_of_eclasses()
+        mapping = egraph.compact(prune)
+        self.egraph = (egraph, mapping[eterm_id])
+        self._record_step("EGraph compacted.")
+        return (
+            True,
+            "Compacted EGraph: " + str(before) + " -> "
+            + str(egraph.number_of_eclasses()) + " E-Classes.",
+        )
+
+    def export(self, extension_format, hops=None, max_class_size=None, max_nodes=None):
         """Saves the currently selected E-Graph into a chosen format.
 
+        The options reduce the exported E-Graph, which keeps the layout of
+        large E-Graphs fast (see Dot.py).
+
         :param extension_format: Determines which format should be used (pdf, svg, png).
+        :param hops: Only export E-Classes within hops of the marked
+            E-Classes or roots.
+        :param max_class_size: Collapse E-Classes with more E-Nodes.
+        :param max_nodes: Maximum number of exported nodes.
         :return: True if successful, False otherwise.
         """
-        return export_egraph_to_file(
-            self.get_current_egraph()[2][1], str(os.getcwd()), extension=extension_format
-        )
+        options = (hops, max_class_size, max_nodes)
+        if any(
+            option is not None and (not isinstance(option, int) or option < 0)
+            for option in options
+        ):
+            return False, "Options must be non-negative integers."
+        if options == (None, None, None) or self.egraphs.is_empty():
+            dot = self.get_current_egraph()[2][1]
+        else:
+            dot = self.egraphs[self.current_major][self.current_minor].dot(*options)
+        return export_egraph_to_file(dot, str(os.getcwd()), extension=extension_format)
 
     def get_all_rules(self):
         """Returns all rules in dictionary format.
@@ -164,45 +354,56 @@ class EGraphService:
             rules[number] = [rule.name, str(rule.expr_lhs), str(rule.expr_rhs)]
         return True, "Loaded rules.", rules
 
-    def add_rule(self, lhs, rhs):
+    def add_rule(self, lhs, rhs, condition=None, bidirectional=True):
         """Checks if rewrite rule has correct format and adds it to the service.
 
         :param lhs: str, left-hand side of rewrite rule
         :param rhs: str, right-hand side of rewrite rule
+        :param condition: condition of the rule (see RewriteRule.py), it is
+            not used for the reverse rule
+        :param bidirectional: if True, the reverse rule is added as well
         :return: bool, str, str (if action is successful, status msg, number of rule)
         """
+        existing_rules = [
+            _rule_identity(str(rule.expr_lhs), str(rule.expr_rhs), rule.condition)
+            for rule in self.dict_of_rules.values()
+        ]
         if (
             is_valid_expression(lhs)
             and is_valid_expression(rhs)
-            and lhs + " => " + rhs
-            not in [
-                str(rule.expr_lhs) + " => " + str(rule.expr_rhs)
-                for rule in self.dict_of_rules.values()
-            ]
+            and _rule_identity(lhs, rhs, condition) not in existing_rules
         ):
-            self.dict_of_rules[self.rrc] = RewriteRule(str(self.rrc), lhs, rhs)
+            self.dict_of_rules[self.rrc] = RewriteRule(
+                str(self.rrc), lhs, rhs, condition
+            )
             self.rrc += 1
 
-            if rhs + " => " + lhs not in [
-                str(rule.expr_lhs) + " => " + str(rule.expr_rhs)
-                for rule in self.dict_of_rules.values()
-            ]:
+            if bidirectional and _rule_identity(rhs, lhs) not in existing_rules:
                 self.dict_of_rules[self.rrc] = RewriteRule(str(self.rrc), rhs, lhs)
                 self.rrc += 1
             return True, "Added rules."
         return False, "No valid rule OR Exists already."
 
-    def apply_all_rules(self):
+    def apply_all_rules(self, limits=None):
         """Apply all rewrite rules to the E-Graph.
 
+        :param limits: RunnerLimits (see Runner.py), defaults to RunnerLimits()
         :return: bool, str (if action is successful, status msg)
         """
-        egraph, debug_information = equality_saturation_no_extract(
-            list(self.dict_of_rules.values()), self.egraph[1], self.egraph[0]
+        egraph, debug_information, report = run_equality_saturation(
+            list(self.dict_of_rules.values()),
+            self.egraph[1],
+            self.egraph[0],
+            scheduler=BackoffScheduler(),
+            limits=limits,
+            extract=False,
+            trace=TRACE_FULL,
         )
         self.egraphs.append(debug_information)
         self.egraph = (egraph, self.egraph[1])
-        return True, "Applied all rules - graph saturated."
+        if report.stop_reason == SATURATED:
+            return True, "Applied all rules - graph saturated. " + str(report)
+        return True, "Applied all rules - " + str(report)
 
     def apply(self, rules):
         """Apply rewrite rule(s) to the E-Graph.
@@ -220,7 +421,7 @@ class EGraphService:
         if applied_rules_str[-1] == ",":
             applied_rules_str = applied_rules_str[0 : len(applied_rules_str) - 1]
         if applied_rules:
-            egraph, debug_information = apply_rules(applied_rules, self.egraph[0])
+            egraph, debug_information = apply_rules(applied_rules, self.egraph[0], trace=TRACE_FULL)
             for rule in applied_rules:
                 self.applied_rules.add(rule.name)
             self.egraph = (egraph, self.egraph[1])
@@ -229,16 +430,27 @@ class EGraphService:
             return False, "No rules applied."
         return True, applied_rules_str
 
+    def _saved_rules(self):
+        """Returns the rewrite rules without a condition in the format of
+        rule files and session snapshots (rules with a condition cannot be
+        saved, see the module's docstring).
+
+        :return: dictionary number -> [name, lhs, rhs]
+        """
+        rules = dict()
+        for number, rule in self.dict_of_rules.items():
+            if rule.condition is None:
+                rules[number] = [rule.name, str(rule.expr_lhs), str(rule.expr_rhs)]
+        return rules
+
     def save_rewrite_rules_to_file(self):
-        """Saves all rewrite rules in a JSON file.
+        """Saves all rewrite rules without a condition in a JSON file.
 
         :return: True if successful, False otherwise.
         """
-        rules = dict()
-        if self.dict_of_rules == dict():
+        rules = self._saved_rules()
+        if rules == dict():
             return False, "No rules to save."
-        for number, rule in self.dict_of_rules.items():
-            rules[number] = [rule.name, str(rule.expr_lhs), str(rule.expr_rhs)]
         try:
             with open(
                 ("rules-" + datetime.now().isoformat() + ".json").replace(":", "_"),
@@ -279,13 +491,12 @@ class EGraphService:
         return True, "Added rewrite rules."
 
     def get_snapshot(self):
-        """Returns a snapshot of the service in JSON format.
+        """Returns a snapshot of the service in JSON format. Rewrite rules
+        with a condition are not part of the snapshot.
 
         :return: JSON, {'RewriteRules': ..., 'Applied': ..., 'graph': ...}
         """
-        rules = dict()
-        for number, rule in self.dict_of_rules.items():
-            rules[number] = [rule.name, str(rule.expr_lhs), str(rule.expr_rhs)]
+        rules = self._saved_rules()
         best_term = _extract_term(self.egraph[1], self.egraph[0])
         return {
             "RewriteRules": rules,
@@ -8,17 +8,42 @@ Classes:
 class ENode:
     """Class that represents an ENode.
 
+    An ENode is an immutable value. Two ENodes are equal if they have the same
+    key and the same arguments, which allows them to be used as keys in the
+    hashcons of the E-Graph.
+
     Attributes:
         - key: Arithmetic operation or variable.
-        - arguments: A list of EClass-IDs.
+        - arguments: A tuple of EClass-IDs.
     """
 
+    __slots__ = ("key", "arguments", "_hash")
+
     def __init__(self, key, arguments):
         """Initialises class. Takes two arguments.
 
         :param key: Arithmetic operation or variable.
-        :param arguments: A list of EClass-IDs.
+        :param arguments: An iterable of EClass-IDs.
         :returns: None.
         """
-        self.key = key
-        self.arguments = arguments
+        object.__setattr__(self, "key", key)
+        object.__setattr__(self, "arguments", tuple(arguments))
+        object.__setattr__(self, "_hash", hash((self.key, self.arguments)))
+
+    def __setattr__(self, name, value):
+        """Prevents modification, ENodes are immutable."""
+        raise AttributeError("ENode is immutable.")
+
+    def __eq__(self, other):
+        """Returns True if both ENodes have the same key and arguments."""
+        if not isinstance(other, ENode):
+            return NotImplemented
+        return self.key == other.key and self.arguments == other.arguments
+
+    def __hash__(self):
+        """Returns the (precomputed) hash of key and arguments."""
+        return self._hash
+
+    def __repr__(self):
+        """Returns a string representation of this ENode."""
+        return f"ENode({self.key!r}, {self.arguments!r})"
@@ -0,0 +1,523 @@
+"""This module implements the extraction state of an e-graph.
+
+Classes:
+    ExtractionState: Best cost and best E-Node per E-Class, kept up to date.
+
+Functions:
+    extract_top_k(egraph, eclass_id, k, cost_function=None)
+    extract_dag(egraph, eclass_ids, cost_function=None, mode=DAG_GREEDY,
+                node_budget=10000)
+
+Implementation:
+    Costs in an e-graph only ever decrease: new E-Nodes add alternatives and
+    merges combine alternatives. The state therefore only has to look at the
+    E-Classes that were created or merged since its last update. Their E-Nodes
+    are pushed onto a priority queue, and every improvement of an E-Class is
+    propagated upwards to the parents of that E-Class. On the first update all
+    E-Classes are new, which makes it a bottom-up computation starting at the
+    leaves (Knuth's generalisation of Dijkstra's algorithm).
+
+    The top-k extraction keeps a list of the k cheapest terms for every
+    E-Class reachable from the root. The list of an E-Class is computed by
+    lazily enumerating, for each of its E-Nodes, the combinations of the lists
+    of its children in cost order. Whenever a list changes, the E-Classes
+    using it are recomputed, until no list changes anymore.
+
+    The DAG extraction pays for every E-Class only once, no matter how often
+    it is used. ``DAG_GREEDY`` computes for every E-Class the set of E-Classes
+    its best term needs (cost = weights of the set) until a fixed point is
+    reached, and then tries to switch single E-Classes to other E-Nodes as
+    long as the total cost decreases. Only E-Classes used by the current DAG
+    are switched, and the cost of a switch is the difference of the
+    E-Classes it adds and removes, which reference counts of the E-Classes
+    in the DAG keep track of. ``DAG_EXACT`` additionally searches all
+    choices with branch-and-bound, starting from the greedy solution, until
+    the node budget is used up.
+"""
+
+from CostFunction import MAX, OperatorWeights
+from collections import deque
+import heapq
+import itertools
+import sys
+
+DAG_GREEDY = "greedy"
+DAG_EXACT = "exact"
+REFINE_PASSES = 8
+
+
+class ExtractionState:
+    """Class that represents the extraction state of an E-Graph.
+
+    Attributes:
+        - costs: Dictionary with the following mapping:
+          EClass-ID -> tuple(cost, best ENode).
+        - version: Version of the E-Graph at the last update.
+        - cost_function: CostFunction the costs were computed with
+          (See CostFunction.py).
+
+    Methods:
+        update(egraph, cost_function=None)
+        reset(cost_function=None)
+    """
+
+    def __init__(self, cost_function=None):
+        """Initialises class. Takes one optional argument.
+
+        :param cost_function: CostFunction, defaults to OperatorWeights().
+        :returns: None.
+        """
+        self.reset(cost_function)
+
+    def reset(self, cost_function=None):
+        """Drops all costs and compiles the cost function into a lookup."""
+        if cost_function is None:
+            cost_function = OperatorWeights()
+        self.costs = {}
+        self.version = 0
+        self.cost_function = cost_function
+        self._weights = dict(cost_function.weights)
+        self._default = cost_function.default
+        self._use_max = cost_function.combine == MAX
+
+    def _enode_cost(self, egraph, enode):
+        """Returns the cost of an E-Node or None if a child has no cost yet."""
+        children_cost = 0
+        for child in enode.arguments:
+            child_cost = self.costs.get(egraph._find(child))
+            if child_cost is None:
+                return None
+            if self._use_max:
+                children_cost = max(children_cost, child_cost[0])
+            else:
+                children_cost += child_cost[0]
+        return self._weights.get(enode.key, self._default) + children_cost
+
+    def update(self, egraph, cost_function=None):
+        """Updates the costs for all E-Classes changed since the last update.
+
+        If the cost function differs from the previous one, all costs are
+        recomputed.
+
+        :param egraph: The E-Graph (rebuilt, if merges are pending).
+        :param cost_function: CostFunction, defaults to OperatorWeights().
+        :return: dict with {canonical EClass-ID -> (cost, ENode)}. Use
+            ``egraph._find`` to look up E-Classes.
+        """
+        if cost_function is None:
+            cost_function = OperatorWeights()
+        if cost_function != self.cost_function:
+            self.reset(cost_function)
+        if egraph.pending:
+            egraph.rebuild()
+        touched = egraph.touched[self.version:]
+        self.version = egraph.current_version()
+        queue = []
+        tie_breaker = itertools.count()
+
+        def push(eclass_id, enode):
+            cost = self._enode_cost(egraph, enode)
+            if cost is not None:
+                heapq.heappush(queue, (cost, next(tie_breaker), eclass_id, enode))
+
+        roots = {}
+        for eclass_id in dict.fromkeys(touched):
+            root = egraph._find(eclass_id)
+            roots[root] = None
+            if eclass_id != root and eclass_id in self.costs:
+                # The E-Class was absorbed by a merge, its best E-Node is a
+                # candidate for the merged E-Class.
+                cost, enode = self.costs.pop(eclass_id)
+                heapq.heappush(queue, (cost, next(tie_breaker), root, enode))
+        for root in roots:
+            for enode in egraph.m[root].nodes:
+                push(root, enode)
+            # The parents of an absorbed E-Class can get cheaper, even if the
+            # cost of the merged E-Class does not change.
+            for p_node, p_eclass in egraph.m[root].parents:
+                push(egraph._find(p_eclass), egraph._canonicalize(p_node))
+
+        while queue:
+            cost, _, eclass_id, enode = heapq.heappop(queue)
+            eclass_id = egraph._find(eclass_id)
+            best = self.costs.get(eclass_id)
+            if best is not None and best[0] <= cost:
+                continue
+            self.costs[eclass_id] = (cost, enode)
+            parents = {
+                (egraph._canonicalize(p_node), egraph._find(p_eclass))
+                for p_node, p_eclass in egraph.m[eclass_id].parents
+            }
+            for p_node, p_eclass in parents:
+                push(p_eclass, p_node)
+        return self.costs
+
+
+def _reachable_eclasses(eclasses, root):
+    """Returns the E-Classes reachable from root, children before parents
+    (as far as cycles allow).
+    """
+    order = []
+    visited = {root}
+    stack = [(root, False)]
+    while stack:
+        eclass_id, expanded = stack.pop()
+        if expanded:
+            order.append(eclass_id)
+            continue
+        stack.append((eclass_id, True))
+        for enode in eclasses[eclass_id]:
+            for child in enode.arguments:
+                if child not in visited:
+                    visited.add(child)
+                    stack.append((child, False))
+    return order
+
+
+def _k_cheapest_combinations(enode, child_lists, k, cost_function, intern):
+    """Enumerates the k cheapest terms of an E-Node in cost order.
+
+    :param child_lists: For every argument, the sorted list of entries
+        (cost, size, term-ID) of the child E-Class.
+    :return: List of entries (cost, size, term-ID).
+    """
+
+    def entry(indices):
+        picked = [child_lists[i][j] for i, j in enumerate(indices)]
+        cost = cost_function.enode_cost(enode.key, [p[0] for p in picked])
+        size = 1 + sum(p[1] for p in picked)
+        return (cost, size, indices, tuple(p[2] for p in picked))
+
+    start = (0,) * len(child_lists)
+    queue = [entry(start)]
+    seen = {start}
+    result = []
+    while queue and len(result) < k:
+        cost, size, indices, child_terms = heapq.heappop(queue)
+        result.append((cost, size, intern(enode.key, child_terms)))
+        for position in range(len(indices)):
+            if indices[position] + 1 < len(child_lists[position]):
+                successor = (
+                    indices[:position]
+                    + (indices[position] + 1,)
+                    + indices[position + 1:]
+                )
+                if successor not in seen:
+                    seen.add(successor)
+                    heapq.heappush(queue, entry(successor))
+    return result
+
+
+def extract_top_k(egraph, eclass_id, k, cost_function=None):
+    """Returns the k cheapest distinct terms of an E-Class.
+
+    :param egraph: The E-Graph (rebuilt, if merges are pending).
+    :param eclass_id: EClass-ID of the term.
+    :param k: Maximum number of terms.
+    :param cost_function: CostFunction, defaults to OperatorWeights().
+    :return: List of tuples (cost, term) sorted by cost (then term size).
+    """
+    if cost_function is None:
+        cost_function = OperatorWeights()
+    if egraph.pending:
+        egraph.rebuild()
+    eclasses = egraph.get_eclasses()
+    root = egraph._find(eclass_id)
+    order = _reachable_eclasses(eclasses, root)
+    enodes = {
+        eclass: sorted(eclasses[eclass], key=lambda enode: (enode.key, enode.arguments))
+        for eclass in order
+    }
+    users = {eclass: set() for eclass in order}
+    for eclass in order:
+        for enode in enodes[eclass]:
+            for child in enode.arguments:
+                users[child].add(eclass)
+
+    term_ids = {}
+    term_nodes = []
+
+    def intern(key, child_terms):
+        term = (key, child_terms)
+        if term not in term_ids:
+            term_ids[term] = len(term_nodes)
+            term_nodes.append(term)
+        return term_ids[term]
+
+    best = {eclass: [] for eclass in order}
+    worklist = deque(order)
+    queued = set(order)
+    while worklist:
+        eclass = worklist.popleft()
+        queued.discard(eclass)
+        candidates = []
+        for enode in enodes[eclass]:
+            child_lists = [best[child] for child in enode.arguments]
+            if all(child_lists):
+                candidates.extend(
+                    _k_cheapest_combinations(enode, child_lists, k, cost_function, intern)
+                )
+        new_best = heapq.nsmallest(k, set(candidates))
+        if new_best == best[eclass]:
+            continue
+        best[eclass] = new_best
+        for user in users[eclass]:
+            if user not in queued:
+                queued.add(user)
+                worklist.append(user)
+    return [(cost, _term_id_to_string(term, term_nodes)) for cost, _, term in best[root]]
+
+
+def _term_id_to_string(term, term_nodes):
+    """Returns the string (prefix-notation) of an interned term."""
+    tokens = []
+    stack = [term]
+    while stack:
+        term = stack.pop()
+        if term is None:
+            tokens.append(")")
+            continue
+        key, child_terms = term_nodes[term]
+        if child_terms:
+            tokens.append("(" + key)
+            stack.append(None)
+            stack.extend(reversed(child_terms))
+        else:
+            tokens.append(key)
+    return " ".join(tokens).replace(" )", ")")
+
+
+def _dag_cost(choices, eclass_ids, weight):
+    """Returns the cost of the DAG selected by choices (every E-Class is paid
+    once) or None if the selection contains a cycle.
+    """
+    state = {}
+    cost = 0
+    for root in eclass_ids:
+        if root in state:
+            continue
+        state[root] = False
+        stack = [(root, iter(choices[root].arguments))]
+        cost += weight(choices[root])
+        while stack:
+            eclass_id, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                state[eclass_id] = True
+                stack.pop()
+            elif child not in state:
+                state[child] = False
+                cost += weight(choices[child])
+                stack.append((child, iter(choices[child].arguments)))
+            elif not state[child]:
+                return None
+    return cost
+
+
+def _greedy_dag(eclasses, order, users, weight):
+    """Returns the choices {EClass-ID -> ENode} of the greedy DAG extraction.
+
+    The best E-Node of an E-Class minimises the weights of the union of the
+    E-Classes needed by its children plus itself.
+    """
+    best = {}
+    worklist = deque(order)
+    queued = set(order)
+    while worklist:
+        eclass_id = worklist.popleft()
+        queued.discard(eclass_id)
+        improved = False
+        for enode in eclasses[eclass_id]:
+            if not all(child in best for child in enode.arguments):
+                continue
+            needed = {eclass_id: weight(enode)}
+            for child in enode.arguments:
+                needed.update(best[child][2])
+            if any(best[child][2].get(eclass_id) is not None for child in enode.arguments):
+                continue
+            cost = sum(needed.values())
+            if eclass_id not in best or cost < best[eclass_id][0]:
+                best[eclass_id] = (cost, enode, needed)
+                improved = True
+        if improved:
+            for user in users[eclass_id]:
+                if user not in queued:
+                    queued.add(user)
+                    worklist.append(user)
+    return {eclass_id: enode for eclass_id, (_, enode, _) in best.items()}
+
+
+def _change_references(arguments, choices, references, weight, step):
+    """Adds step (1 or -1) to the reference counts of the E-Classes in
+    arguments. An E-Class that becomes used (unused) adds (removes) its
+    weight and the references of its chosen E-Node.
+
+    :return: The change of the DAG cost.
+    """
+    delta = 0
+    used = 1 if step > 0 else 0
+    stack = list(dict.fromkeys(arguments))
+    while stack:
+        eclass_id = stack.pop()
+        references[eclass_id] = references.get(eclass_id, 0) + step
+        if references[eclass_id] == used:
+            enode = choices[eclass_id]
+            delta += step * weight(enode)
+            stack.extend(dict.fromkeys(enode.arguments))
+    return delta
+
+
+def _switch(eclass_id, enode, choices, references, weight):
+    """Chooses enode for a used E-Class and returns the change of the DAG
+    cost.
+    """
+    current = choices[eclass_id]
+    choices[eclass_id] = enode
+    delta = weight(enode) - weight(current)
+    delta += _change_references(enode.arguments, choices, references, weight, 1)
+    delta += _change_references(current.arguments, choices, references, weight, -1)
+    return delta
+
+
+def _reaches(choices, arguments, eclass_id):
+    """Returns True if the choices lead from arguments to eclass_id."""
+    stack = list(arguments)
+    visited = set(stack)
+    while stack:
+        child = stack.pop()
+        if child == eclass_id:
+            return True
+        for argument in choices[child].arguments:
+            if argument not in visited:
+                visited.add(argument)
+                stack.append(argument)
+    return False
+
+
+def _refine_dag(eclasses, order, choices, eclass_ids, weight, passes=REFINE_PASSES):
+    """Switches single E-Classes of the DAG to other E-Nodes while the cost
+    decreases, for at most passes passes over the E-Classes.
+    """
+    references = {}
+    cost = _change_references(eclass_ids, choices, references, weight, 1)
+    improved = True
+    while improved and passes > 0:
+        improved = False
+        passes -= 1
+        for eclass_id in order:
+            if not references.get(eclass_id):
+                continue
+            for enode in eclasses[eclass_id]:
+                current = choices[eclass_id]
+                if (
+                    enode == current
+                    or eclass_id in enode.arguments
+                    or not all(child in choices for child in enode.arguments)
+                ):
+                    continue
+                delta = _switch(eclass_id, enode, choices, references, weight)
+                if delta < 0 and not _reaches(choices, enode.arguments, eclass_id):
+                    cost += delta
+                    improved = True
+                else:
+                    _switch(eclass_id, current, choices, references, weight)
+    return cost
+
+
+def _branch_and_bound_dag(eclasses, eclass_ids, best, weight, node_budget):
+    """Searches the cheapest acyclic choices with branch-and-bound.
+
+    :param best: Tuple (cost, choices) of a known solution (upper bound).
+    :return: Tuple (cost, choices, optimal), optimal is False if the node
+        budget was used up before the search space was exhausted.
+    """
+    min_weight = {
+        eclass_id: min(weight(enode) for enode in enodes)
+        for eclass_id, enodes in eclasses.items()
+    }
+    options = {
+        eclass_id: sorted(
+            (enode for enode in enodes if eclass_id not in enode.arguments),
+            key=lambda enode: (weight(enode), enode.key, enode.arguments),
+        )
+        for eclass_id, enodes in eclasses.items()
+    }
+    chosen = {}
+    explored = 0
+
+    def search(pending, cost):
+        nonlocal explored, best
+        explored += 1
+        if explored > node_budget:
+            return False
+        pending = [eclass_id for eclass_id in pending if eclass_id not in chosen]
+        if cost + sum(min_weight[eclass_id] for eclass_id in set(pending)) >= best[0]:
+            return True
+        if not pending:
+            # Only reached with cost < best[0] (see the bound above).
+            if _dag_cost(chosen, eclass_ids, weight) is not None:
+                best = (cost, dict(chosen))
+            return True
+        eclass_id = pending[-1]
+        for enode in options[eclass_id]:
+            chosen[eclass_id] = enode
+            finished = search(pending[:-1] + list(enode.arguments), cost + weight(enode))
+            del chosen[eclass_id]
+            if not finished:
+                return False
+        return True
+
+    optimal = search(list(eclass_ids), 0)
+    return best[0], best[1], optimal
+
+
+def extract_dag(egraph, eclass_ids, cost_function=None, mode=DAG_GREEDY, node_budget=10000):
+    """Extracts the cheapest DAG for the given E-Classes, where every E-Class
+    is paid only once.
+
+    :param egraph: The E-Graph (rebuilt, if merges are pending).
+    :param eclass_ids: EClass-IDs of the roots.
+    :param cost_function: CostFunction that combines by sum, defaults to
+        OperatorWeights().
+    :param mode: DAG_GREEDY or DAG_EXACT.
+    :param node_budget: Maximum number of search nodes for DAG_EXACT.
+    :return: cost, choices {canonical EClass-ID -> ENode}, optimal (True if
+        the exact search finished within the node budget)
+    """
+    if cost_function is None:
+        cost_function = OperatorWeights()
+    if cost_function.combine == MAX:
+        raise ValueError("DAG extraction requires a cost function that combines by sum.")
+    if mode not in (DAG_GREEDY, DAG_EXACT):
+        raise ValueError("mode must be '" + DAG_GREEDY + "' or '" + DAG_EXACT + "'.")
+    if egraph.pending:
+        egraph.rebuild()
+
+    def weight(enode):
+        return cost_function.node_cost(enode.key)
+
+    eclasses = egraph.get_eclasses()
+    roots = list(dict.fromkeys(egraph._find(eclass_id) for eclass_id in eclass_ids))
+    order = {}
+    for root in roots:
+        order.update(dict.fromkeys(_reachable_eclasses(eclasses, root)))
+    order = list(order)
+    eclasses = {
+        eclass_id: sorted(eclasses[eclass_id], key=lambda enode: (enode.key, enode.arguments))
+        for eclass_id in order
+    }
+    users = {eclass_id: set() for eclass_id in order}
+    for eclass_id in order:
+        for enode in eclasses[eclass_id]:
+            for child in enode.arguments:
+                users[child].add(eclass_id)
+
+    choices = _greedy_dag(eclasses, order, users, weight)
+    cost = _refine_dag(eclasses, order, choices, roots, weight)
+    optimal = False
+    if mode == DAG_EXACT:
+        if len(order) < sys.getrecursionlimit() // 2:
+            cost, choices, optimal = _branch_and_bound_dag(
+                eclasses, roots, (cost, choices), weight, node_budget
+            )
+    return cost, choices, optimal
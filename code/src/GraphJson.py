@@ -0,0 +1,51 @@
+"""This module serialises E-Graphs into a compact JSON format.
+
+Functions:
+    eclasses_to_json: Returns the JSON object of a mapping of E-Classes.
+
+Implementation:
+    Like Dot.py, the serialiser only needs the canonical E-Classes
+    (EClass-ID -> E-Nodes) and a find function, so it works for live E-Graphs
+    (see ``EGraph.egraph_to_json``) and the snapshots of a debug trace (see
+    Trace.py). The E-Nodes are stored column by column, the ID of an E-Node
+    is its index in the columns:
+
+    - ``classes``: Canonical EClass-IDs.
+    - ``roots``: Canonical EClass-IDs of the roots.
+    - ``marked``: Canonical EClass-IDs of the marked E-Classes.
+    - ``nodes``: ``{"eclass": [...], "key": [...], "children": [[...], ...]}``,
+      the E-Class, key and canonical child EClass-IDs of every E-Node.
+
+    The E-Nodes are ordered by E-Class and sorted within their E-Class, so
+    the same E-Graph always results in the same object. Unlike DOT, no layout
+    information is produced, the client renders the E-Graph itself.
+"""
+
+
+def eclasses_to_json(classes, find, marked_eclasses=(), roots=()):
+    """Returns a JSON serialisable dictionary of E-Classes.
+
+    :param classes: Mapping canonical EClass-ID -> E-Nodes.
+    :param find: Function that returns the canonical EClass-ID of an argument.
+    :param marked_eclasses: EClass-IDs that are marked.
+    :param roots: EClass-IDs of the roots.
+    :return: dict (see the module's docstring)
+    """
+    eclass_column = []
+    key_column = []
+    children_column = []
+    for eclass_id, enodes in classes.items():
+        for enode in sorted(enodes, key=lambda enode: (enode.key, enode.arguments)):
+            eclass_column.append(eclass_id)
+            key_column.append(enode.key)
+            children_column.append([find(argument) for argument in enode.arguments])
+    return {
+        "classes": list(classes),
+        "roots": list(dict.fromkeys(find(eclass_id) for eclass_id in roots)),
+        "marked": list(dict.fromkeys(find(eclass_id) for eclass_id in marked_eclasses)),
+        "nodes": {
+            "eclass": eclass_column,
+            "key": key_column,
+            "children": children_column,
+        },
+    }
@@ -0,0 +1,236 @@
+"""This module compiles the sides of rewrite rules into patterns.
+
+Classes:
+    Pattern: Represents a compiled pattern (one side of a rewrite rule).
+
+Compilation:
+    A left-hand side is compiled once into a flat list of instructions, which
+    are then chained into specialised matcher functions (one closure per
+    instruction). A right-hand side is compiled into a flat instantiation plan
+    (post-order list of E-Nodes to add). All checks whether a leaf is a
+    variable or a literal are resolved at compile time.
+"""
+
+import re
+from ENode import ENode
+
+_BIND = 0
+_COMPARE = 1
+
+
+def _is_variable(ast_node):
+    """Returns True if the ASTNode is a variable (leaf that is no number)."""
+    return (
+        ast_node.left is None
+        and ast_node.right is None
+        and not re.match("[0-9]+", ast_node.key)
+    )
+
+
+def _children(ast_node):
+    """Returns the children of an ASTNode as a list."""
+    return [child for child in (ast_node.left, ast_node.right) if child is not None]
+
+
+class Pattern:
+    """Class that represents a compiled pattern.
+
+    Attributes:
+        - root_key: Key of the root node or None if the root is a variable.
+        - variables: Tuple with the names of all variables.
+        - depth: Number of levels of E-Nodes the pattern spans.
+        - instructions: List of matcher instructions.
+        - plan: List with the instantiation plan.
+
+    Methods:
+        match(egraph, eclasses, eclass_id, dirty=None)
+        instantiate(egraph, environment, memo=None)
+    """
+
+    def __init__(self, ast_node):
+        """Initialises class. Takes one argument.
+
+        :param ast_node: Root ASTNode of the pattern.
+        :returns: None.
+        """
+        self.root_key = None if _is_variable(ast_node) else ast_node.key
+        self.instructions = []
+        self._var_registers = {}
+        self._number_of_registers = 1
+        self._compile_instructions(ast_node, 0)
+        self.variables = tuple(self._var_registers.keys())
+        self.depth = self._depth(ast_node)
+        self._var_registers_items = tuple(self._var_registers.items())
+        self._matcher = self._chain_instructions()
+        self.plan = []
+        self._plan_variables = []
+        self._compile_plan(ast_node)
+
+    def _depth(self, ast_node):
+        """Returns the number of levels of non-variable nodes."""
+        if _is_variable(ast_node):
+            return 0
+        return 1 + max((self._depth(child) for child in _children(ast_node)), default=0)
+
+    def _compile_instructions(self, ast_node, register):
+        """Compiles the pattern (preorder) into matcher instructions."""
+        if _is_variable(ast_node):
+            if ast_node.key in self._var_registers:
+                self.instructions.append(
+                    (_COMPARE, self._var_registers[ast_node.key], register)
+                )
+            else:
+                self._var_registers[ast_node.key] = register
+            return
+        children = _children(ast_node)
+        first_child_register = self._number_of_registers
+        self._number_of_registers += len(children)
+        self.instructions.append(
+            (_BIND, register, ast_node.key, len(children), first_child_register)
+        )
+        for offset, child in enumerate(children):
+            self._compile_instructions(child, first_child_register + offset)
+
+    def _chain_instructions(self):
+        """Turns the instruction list into a chain of matcher functions."""
+
+        def done(find, eclasses, registers, matches):
+            matches.append(tuple(registers))
+
+        step = done
+        for instruction in reversed(self.instructions):
+            if instruction[0] == _BIND:
+                step = self._bind_step(instruction, step)
+            else:
+                step = self._compare_step(instruction, step)
+        return step
+
+    @staticmethod
+    def _bind_step(instruction, next_step):
+        """Returns a function that iterates over all matching E-Nodes."""
+        _, register, key, arity, first_child_register = instruction
+        last_child_register = first_child_register + arity
+
+        if arity == 0:
+
+            def bind_literal(find, eclasses, registers, matches):
+                for enode in eclasses[find(registers[register])]:
+                    if enode.key == key and not enode.arguments:
+                        next_step(find, eclasses, registers, matches)
+                        return
+
+            return bind_literal
+
+        def bind(find, eclasses, registers, matches):
+            for enode in eclasses[find(registers[register])]:
+                if enode.key == key and len(enode.arguments) == arity:
+                    registers[first_child_register:last_child_register] = enode.arguments
+                    next_step(find, eclasses, registers, matches)
+
+        return bind
+
+    @staticmethod
+    def _compare_step(instruction, next_step):
+        """Returns a function that checks two registers for equality."""
+        _, register1, register2 = instruction
+
+        def compare(find, eclasses, registers, matches):
+            if find(registers[register1]) == find(registers[register2]):
+                next_step(find, eclasses, registers, matches)
+
+        return compare
+
+    def _compile_plan(self, ast_node):
+        """Compiles the pattern (postorder) into the instantiation plan.
+
+        Each entry is a tuple (key, arguments, is_variable), where arguments
+        are indices of earlier entries. For every entry, the variables of its
+        subpattern are stored in ``_plan_variables``.
+        """
+        if _is_variable(ast_node):
+            self.plan.append((ast_node.key, (), True))
+            self._plan_variables.append((ast_node.key,))
+            return len(self.plan) - 1
+        arguments = tuple(self._compile_plan(child) for child in _children(ast_node))
+        self.plan.append((ast_node.key, arguments, False))
+        self._plan_variables.append(
+            tuple(sorted({v for arg in arguments for v in self._plan_variables[arg]}))
+        )
+        return len(self.plan) - 1
+
+    def match(self, egraph, eclasses, eclass_id, dirty=None):
+        """Matches the pattern against one E-Class.
+
+        :param egraph: The E-Graph.
+        :param eclasses: Dictionary with canonical EClass-ID -> set of E-Nodes.
+        :param eclass_id: Canonical EClass-ID.
+        :param dirty: Optional set of canonical EClass-IDs. If given, only
+            matches whose matched E-Classes include one of them are returned.
+        :returns: List of environments (variable -> EClass-ID), no duplicates.
+        """
+        find = egraph._find
+        registers = [None] * self._number_of_registers
+        registers[0] = eclass_id
+        matches = []
+        self._matcher(find, eclasses, registers, matches)
+        environments = {}
+        for registers in matches:
+            if dirty is not None and not any(
+                find(eclass_id) in dirty for eclass_id in registers
+            ):
+                continue
+            values = tuple(registers[reg] for _, reg in self._var_registers_items)
+            if values not in environments:
+                environments[values] = {
+                    name: registers[reg] for name, reg in self._var_registers_items
+                }
+        return list(environments.values())
+
+    def instantiate(self, egraph, environment, memo=None):
+        """Adds the pattern (with variables taken from the environment) to the
+        E-Graph and returns the EClass-ID of its root.
+
+        Variables that are not bound in the environment are added as leaves.
+        If a memo (dictionary) is given, the EClass-IDs of instantiated
+        subpatterns are remembered per bound canonical EClass-IDs, so that
+        repeated instantiations skip building and hashing their E-Nodes.
+        """
+        if memo is None:
+            return self._instantiate_plan(egraph, environment, None)
+        find = egraph._find
+        root_key = (
+            self,
+            len(self.plan) - 1,
+            tuple(find(environment[v]) if v in environment else v
+                  for v in self._plan_variables[-1]),
+        )
+        if root_key in memo:
+            return find(memo[root_key])
+        return self._instantiate_plan(egraph, environment, memo)
+
+    def _instantiate_plan(self, egraph, environment, memo):
+        """Runs the instantiation plan (see ``instantiate``)."""
+        find = egraph._find
+        eclass_ids = []
+        for step, (key, arguments, is_variable) in enumerate(self.plan):
+            if is_variable and key in environment:
+                eclass_ids.append(environment[key])
+                continue
+            if memo is None:
+                eclass_ids.append(
+                    egraph._add(ENode(key, [eclass_ids[arg] for arg in arguments]))
+                )
+                continue
+            memo_key = (
+                self,
+                step,
+                tuple(find(environment[v]) if v in environment else v
+                      for v in self._plan_variables[step]),
+            )
+            if memo_key in memo:
+                eclass_ids.append(find(memo[memo_key]))
+            else:
+                eclass_id = egraph._add(ENode(key, [eclass_ids[arg] for arg in arguments]))
+                memo[memo_key] = eclass_id
+                eclass_ids.append(eclass_id)
+        return eclass_ids[-1]
@@ -2,9 +2,26 @@
 
 Classes:
     RewriteRule: Represents a rewrite rule with a left and a right side.
+
+Functions:
+    is_constant(variable)
+    is_nonzero_constant(variable)
+    eclass_size_below(variable, size)
+
+Conditions and appliers:
+    A condition is a callable ``condition(egraph, eclass_id, environment)``
+    that returns True if the match may be applied. It is checked by
+    ``apply_rules`` right after the search, before anything is added to the
+    E-Graph. The functions of this module return such conditions.
+
+    The right side of a rule can also be an applier, i.e. a callable
+    ``applier(egraph, eclass_id, environment)`` that returns the EClass-ID to
+    merge with the matched E-Class or None (nothing is merged).
 """
 
+import re
 import AbstractSyntaxTree
+from Pattern import Pattern
 
 
 class RewriteRule:
@@ -13,21 +30,89 @@ class RewriteRule:
     Attributes:
         - name: String
         - expr_lhs: String in prefix-notation
-        - expr_rhs: String in prefix-notation
+        - expr_rhs: String in prefix-notation (None if the rule has an applier)
+        - lhs_pattern: Compiled matcher for the left side (See Pattern.py).
+        - rhs_pattern: Compiled instantiation plan for the right side (None if
+          the rule has an applier).
+        - applier: Callable that replaces the right side or None.
+        - condition: Callable that guards the rule or None.
     """
 
-    def __init__(self, name, expr_lhs, expr_rhs):
-        """Initialises class. Takes three arguments.
+    def __init__(self, name, expr_lhs, expr_rhs, condition=None):
+        """Initialises class. Takes three or four arguments.
 
         :param name: Name of that rewrite rule.
         :param expr_lhs: Left side of the rewrite rule.
-        :param expr_rhs: Right side of the rewrite rule.
+        :param expr_rhs: Right side of the rewrite rule or an applier.
+        :param condition: Condition that every match has to fulfil.
         :returns: None.
         """
         self.name = name
         self.expr_lhs = AbstractSyntaxTree.AbstractSyntaxTree(expr_lhs)
-        self.expr_rhs = AbstractSyntaxTree.AbstractSyntaxTree(expr_rhs)
+        self.lhs_pattern = Pattern(self.expr_lhs.root_node)
+        self.condition = condition
+        if callable(expr_rhs):
+            self.applier = expr_rhs
+            self.expr_rhs = None
+            self.rhs_pattern = None
+        else:
+            self.applier = None
+            self.expr_rhs = AbstractSyntaxTree.AbstractSyntaxTree(expr_rhs)
+            self.rhs_pattern = Pattern(self.expr_rhs.root_node)
 
     def __str__(self):
         """Returns a string representation of this rule."""
-        return f"[{self.name}: {self.expr_lhs} => {self.expr_rhs}]"
+        rhs = self.expr_rhs
+        if self.applier is not None:
+            rhs = getattr(self.applier, "__name__", "applier")
+        condition = ""
+        if self.condition is not None:
+            condition = " if " + getattr(self.condition, "__name__", "condition")
+        return f"[{self.name}: {self.expr_lhs} => {rhs}{condition}]"
+
+
+def _constant_value(egraph, eclass_id):
+    """Returns the integer value of an E-Class or None.
+
+    The data of the constant folding analysis is used if available, otherwise
+    the integer literals of the E-Class.
+    """
+    eclass = egraph.m[egraph._find(eclass_id)]
+    if isinstance(eclass.data, int):
+        return eclass.data
+    for enode in eclass.nodes:
+        if not enode.arguments and re.fullmatch("[0-9]+", enode.key):
+            return int(enode.key)
+    return None
+
+
+def is_constant(variable):
+    """Returns a condition: the variable is bound to a constant."""
+
+    def condition(egraph, eclass_id, environment):
+        return _constant_value(egraph, environment[variable]) is not None
+
+    condition.__name__ = "is_constant(" + variable + ")"
+    return condition
+
+
+def is_nonzero_constant(variable):
+    """Returns a condition: the variable is bound to a constant other than 0."""
+
+    def condition(egraph, eclass_id, environment):
+        return _constant_value(egraph, environment[variable]) not in (None, 0)
+
+    condition.__name__ = "is_nonzero_constant(" + variable + ")"
+    return condition
+
+
+def eclass_size_below(variable, size):
+    """Returns a condition: the E-Class bound to the variable has fewer than
+    size E-Nodes.
+    """
+
+    def condition(egraph, eclass_id, environment):
+        return len(egraph.m[egraph._find(environment[variable])].nodes) < size
+
+    condition.__name__ = "eclass_size_below(" + variable + ", " + str(size) + ")"
+    return condition
@@ -0,0 +1,113 @@
+"""This module contains the configuration and the report of saturation runs.
+
+Classes:
+    RunnerLimits: Resource limits of a saturation run.
+    RunnerReport: Report of a finished saturation run.
+
+Stop reasons:
+    - ``SATURATED``: An iteration neither added E-Nodes nor merged E-Classes.
+    - ``ITERATION_LIMIT``: The iteration limit was reached.
+    - ``NODE_LIMIT``: The E-Graph has more E-Nodes than allowed.
+    - ``ECLASS_LIMIT``: The E-Graph has more E-Classes than allowed.
+    - ``TIME_LIMIT``: The run took longer than allowed.
+"""
+
+import time
+
+SATURATED = "saturated"
+ITERATION_LIMIT = "iteration limit"
+NODE_LIMIT = "node limit"
+ECLASS_LIMIT = "eclass limit"
+TIME_LIMIT = "time limit"
+
+
+class RunnerLimits:
+    """Class that represents the resource limits of a saturation run.
+
+    A limit that is None is not checked.
+
+    Attributes:
+        - iteration_limit: Maximum number of iterations.
+        - node_limit: Maximum number of E-Nodes.
+        - eclass_limit: Maximum number of E-Classes.
+        - time_limit: Maximum wall-clock time in seconds.
+
+    Methods:
+        check(egraph, iteration, start_time)
+    """
+
+    def __init__(
+        self, iteration_limit=30, node_limit=10000, eclass_limit=10000, time_limit=5.0
+    ):
+        """Initialises class. Takes four optional arguments.
+
+        :param iteration_limit: Maximum number of iterations.
+        :param node_limit: Maximum number of E-Nodes.
+        :param eclass_limit: Maximum number of E-Classes.
+        :param time_limit: Maximum wall-clock time in seconds.
+        :returns: None.
+        """
+        self.iteration_limit = iteration_limit
+        self.node_limit = node_limit
+        self.eclass_limit = eclass_limit
+        self.time_limit = time_limit
+
+    def check(self, egraph, iteration, start_time):
+        """Checks all limits.
+
+        :param egraph: The E-Graph.
+        :param iteration: Number of iterations performed so far.
+        :param start_time: Start of the run (``time.perf_counter()``).
+        :returns: The stop reason of the first exceeded limit or None.
+        """
+        if self.iteration_limit is not None and iteration >= self.iteration_limit:
+            return ITERATION_LIMIT
+        if self.node_limit is not None and egraph.number_of_enodes() > self.node_limit:
+            return NODE_LIMIT
+        if (
+            self.eclass_limit is not None
+            and egraph.number_of_eclasses() > self.eclass_limit
+        ):
+            return ECLASS_LIMIT
+        if (
+            self.time_limit is not None
+            and time.perf_counter() - start_time > self.time_limit
+        ):
+            return TIME_LIMIT
+        return None
+
+
+class RunnerReport:
+    """Class that represents the report of a saturation run.
+
+    Attributes:
+        - stop_reason: Why the run stopped (see module docstring).
+        - iterations: Number of iterations performed.
+        - number_of_enodes: Number of E-Nodes at the end of the run.
+        - number_of_eclasses: Number of E-Classes at the end of the run.
+        - total_time: Duration of the run in seconds.
+        - best_term: Best term, if it was extracted.
+    """
+
+    def __init__(
+        self, stop_reason, iterations, number_of_enodes, number_of_eclasses, total_time,
+        best_term=None,
+    ):
+        """Initialises class. Takes six arguments (see class docstring).
+
+        :returns: None.
+        """
+        self.stop_reason = stop_reason
+        self.iterations = iterations
+        self.number_of_enodes = number_of_enodes
+        self.number_of_eclasses = number_of_eclasses
+        self.total_time = total_time
+        self.best_term = best_term
+
+    def __str__(self):
+        """Returns a short summary of the report."""
+        return (
+            f"Stopped: {self.stop_reason} after {self.iterations} iteration(s), "
+            f"{self.number_of_enodes} E-Nodes, {self.number_of_eclasses} E-Classes, "
+            f"{self.total_time:.3f}s."
+        )
@@ -0,0 +1,131 @@
+"""This module implements rule schedulers for equality saturation.
+
+Classes:
+    Scheduler: Applies every rule in every iteration.
+    BackoffScheduler: Bans rules that produce too many matches.
+
+Implementation:
+    A scheduler decides in every iteration which rules are searched and
+    whether their matches are applied. ``apply_rules`` and the saturation loops
+    in EGraph.py call the following methods:
+
+    - ``can_search(iteration, rule)``: Is the rule searched in this iteration?
+    - ``accept_matches(iteration, rule, matches)``: Are the matches applied?
+    - ``can_stop(iteration)``: May the saturation loop stop?
+
+    The ``BackoffScheduler`` is based on the scheduler of the same name in egg
+    (e-graphs-good):
+        url: https://docs.rs/egg/latest/egg/struct.BackoffScheduler.html
+"""
+
+
+class Scheduler:
+    """Class that represents a scheduler that applies every rule in every
+    iteration. Serves as base class for other schedulers.
+    """
+
+    def can_search(self, iteration, rule):
+        """Returns True if the rule should be searched in this iteration."""
+        return True
+
+    def accept_matches(self, iteration, rule, matches):
+        """Returns True if the matches of the rule should be applied."""
+        return True
+
+    def can_stop(self, iteration):
+        """Returns True if the saturation loop may stop in this iteration."""
+        return True
+
+
+class _RuleStats:
+    """Class that holds the statistics of a rule for the BackoffScheduler."""
+
+    def __init__(self, match_limit, ban_length):
+        """Initialises class. Takes two arguments.
+
+        :param match_limit: Number of matches before the rule gets banned.
+        :param ban_length: Number of iterations the rule is banned for.
+        :returns: None.
+        """
+        self.times_applied = 0
+        self.times_banned = 0
+        self.banned_until = 0
+        self.match_limit = match_limit
+        self.ban_length = ban_length
+
+
+class BackoffScheduler(Scheduler):
+    """Class that represents a scheduler with exponential backoff.
+
+    If a rule has more matches than its match limit, the matches are dropped
+    and the rule is banned for some iterations. Every time a rule gets banned,
+    both its match limit and its ban length are doubled. When the E-Graph
+    stops changing while rules are banned, the bans are lifted instead of
+    stopping the saturation.
+
+    Attributes:
+        - match_limit: Default match limit for all rules.
+        - ban_length: Default ban length (iterations) for all rules.
+        - stats: Dictionary with the following mapping: RewriteRule -> stats.
+
+    Methods:
+        set_match_limit(rule, match_limit)
+        set_ban_length(rule, ban_length)
+        is_banned(iteration, rule)
+    """
+
+    def __init__(self, match_limit=1000, ban_length=5):
+        """Initialises class. Takes two optional arguments.
+
+        :param match_limit: Default match limit for all rules.
+        :param ban_length: Default ban length (iterations) for all rules.
+        :returns: None.
+        """
+        self.match_limit = match_limit
+        self.ban_length = ban_length
+        self.stats = {}
+
+    def _rule_stats(self, rule):
+        """Returns the statistics of a rule (creates them if necessary)."""
+        if rule not in self.stats:
+            self.stats[rule] = _RuleStats(self.match_limit, self.ban_length)
+        return self.stats[rule]
+
+    def set_match_limit(self, rule, match_limit):
+        """Sets the initial match limit of a single rule."""
+        self._rule_stats(rule).match_limit = match_limit
+
+    def set_ban_length(self, rule, ban_length):
+        """Sets the initial ban length of a single rule."""
+        self._rule_stats(rule).ban_length = ban_length
+
+    def is_banned(self, iteration, rule):
+        """Returns True if the rule is banned in this iteration."""
+        return iteration < self._rule_stats(rule).banned_until
+
+    def can_search(self, iteration, rule):
+        """Returns False while the rule is banned."""
+        return not self.is_banned(iteration, rule)
+
+    def accept_matches(self, iteration, rule, matches):
+        """Bans the rule if it has more matches than its current threshold."""
+        stats = self._rule_stats(rule)
+        threshold = stats.match_limit << stats.times_banned
+        if len(matches) > threshold:
+            stats.banned_until = iteration + (stats.ban_length << stats.times_banned)
+            stats.times_banned += 1
+            return False
+        stats.times_applied += 1
+        return True
+
+    def can_stop(self, iteration):
+        """Returns True if no rule is banned. Otherwise, the bans are
+        shortened so that the earliest banned rule is usable again.
+        """
+        banned = [stats for stats in self.stats.values() if stats.banned_until > iteration]
+        if not banned:
+            return True
+        delta = min(stats.banned_until for stats in banned) - iteration
+        for stats in banned:
+            stats.banned_until -= delta
+        return False
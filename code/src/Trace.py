@@ -0,0 +1,312 @@
+"""This module implements the debug trace of rule applications.
+
+Classes:
+    EGraphSnapshot: Copy of the E-Classes of an E-Graph.
+    Journal: Log of the mutations of an E-Graph with periodic keyframes.
+    TraceEvent: Structured record of one step of a rule application.
+
+Functions:
+    record: Appends a TraceEvent to a list of events, depending on the mode.
+
+Implementation:
+    Rendering an E-Graph in DOT notation is far more expensive than applying
+    a rule. Thus, the trace is opt-in and has three modes:
+
+    - ``TRACE_OFF``: No events are recorded.
+    - ``TRACE_EVENTS``: Events (message, rule, EClass-IDs, environment and
+      counters of the E-Graph) are recorded, but no DOT.
+    - ``TRACE_FULL``: Events additionally keep their position in the journal
+      of the E-Graph. The E-Graph of a step is only reconstructed and rendered
+      in DOT notation when the step is requested.
+
+    The journal logs every mutation of the E-Graph (added E-Node, union of
+    two E-Classes, canonicalised E-Node, compaction) instead of copying the
+    E-Graph for every step, so its memory grows with the number of changes.
+    Every ``keyframe_interval`` entries (and after a compaction), a full
+    snapshot is stored as keyframe. A step is reconstructed by replaying the
+    entries since the last keyframe before it.
+
+    For backwards compatibility, a TraceEvent behaves like the former debug
+    entries ``[message, dot]``: ``event[0]`` is the message and ``event[1]``
+    the (lazily rendered) DOT string or None.
+"""
+
+from array import array
+from bisect import bisect_right
+from Dot import eclasses_to_dot
+from GraphJson import eclasses_to_json
+
+TRACE_OFF = "off"
+TRACE_EVENTS = "events"
+TRACE_FULL = "full"
+TRACE_MODES = (TRACE_OFF, TRACE_EVENTS, TRACE_FULL)
+
+
+class EGraphSnapshot:
+    """Class that represents a snapshot of the E-Classes of an E-Graph.
+
+    Attributes:
+        - classes: Dictionary with the following mapping:
+          canonical EClass-ID -> E-Nodes (tuple, or set in copies).
+        - parents: Copy of the union-find parents (see UnionFind.py).
+
+    Methods:
+        copy()
+        apply(entry)
+        find(eclass_id)
+        to_dot(nodesep=0.5, ranksep=0.5, marked_eclasses=(), **options)
+        to_json(marked_eclasses=(), roots=())
+    """
+
+    def __init__(self, egraph=None):
+        """Initialises class. Takes one optional argument.
+
+        :param egraph: The E-Graph, defaults to an empty snapshot.
+        :returns: None.
+        """
+        self.classes = {}
+        self.parents = array("i")
+        if egraph is not None:
+            self.classes = {
+                eclass_id: tuple(nodes) for eclass_id, nodes in egraph.classes.items()
+            }
+            self.parents = array("i", egraph.u.parents)
+
+    def copy(self):
+        """Returns a copy of the snapshot that can be changed by ``apply``."""
+        snapshot = EGraphSnapshot()
+        snapshot.classes = {
+            eclass_id: set(nodes) for eclass_id, nodes in self.classes.items()
+        }
+        snapshot.parents = array("i", self.parents)
+        return snapshot
+
+    def apply(self, entry):
+        """Applies a journal entry (see ``Journal.log``) to a copy."""
+        if entry[0] == "add":
+            _, eclass_id, enode = entry
+            self.parents.append(eclass_id)
+            self.classes[eclass_id] = {enode}
+        elif entry[0] == "union":
+            _, old_id, new_id = entry
+            self.parents[old_id] = new_id
+            self.classes[new_id] |= self.classes.pop(old_id)
+        elif entry[0] == "replace":
+            _, eclass_id, old_enode, new_enode = entry
+            self.classes[eclass_id].discard(old_enode)
+            self.classes[eclass_id].add(new_enode)
+        else:
+            raise ValueError("Cannot replay journal entry " + str(entry[0]) + ".")
+
+    def find(self, eclass_id):
+        """Returns the canonical EClass-ID at the time of the snapshot."""
+        parents = self.parents
+        while parents[eclass_id] != eclass_id:
+            eclass_id = parents[eclass_id]
+        return eclass_id
+
+    def to_dot(self, nodesep=0.5, ranksep=0.5, marked_eclasses=(), **options):
+        """Returns a string of the snapshot in DOT notation. The options are
+        roots, hops, max_class_size and max_nodes (see Dot.py).
+        """
+        return eclasses_to_dot(
+            self.classes, self.find, nodesep, ranksep, marked_eclasses, **options
+        )
+
+    def to_json(self, marked_eclasses=(), roots=()):
+        """Returns a JSON serialisable dictionary of the snapshot (see
+        GraphJson.py).
+        """
+        return eclasses_to_json(self.classes, self.find, marked_eclasses, roots)
+
+
+class Journal:
+    """Class that represents the journal of the mutations of an E-Graph.
+
+    Attributes:
+        - entries: List of entries, i.e. tuples ("add", EClass-ID, E-Node),
+          ("union", absorbed EClass-ID, new EClass-ID), ("replace",
+          EClass-ID, old E-Node, new E-Node) or ("compact",).
+        - keyframes: Dictionary with the following mapping:
+          position -> EGraphSnapshot.
+        - keyframe_interval: Number of entries between two keyframes.
+
+    Methods:
+        log(entry)
+        position()
+        keyframe(egraph)
+        checkpoint(egraph)
+        snapshot(position)
+    """
+
+    def __init__(self, egraph, keyframe_interval=1000):
+        """Initialises class. Takes one or two arguments.
+
+        :param egraph: The E-Graph, its current state is the first keyframe.
+        :param keyframe_interval: Number of entries between two keyframes.
+        :returns: None.
+        """
+        self.entries = []
+        self.keyframes = {0: EGraphSnapshot(egraph)}
+        self.keyframe_interval = keyframe_interval
+        self._positions = [0]
+
+    def log(self, entry):
+        """Appends an entry (called by the E-Graph)."""
+        self.entries.append(entry)
+
+    def position(self):
+        """Returns the current position in the journal."""
+        return len(self.entries)
+
+    def keyframe(self, egraph):
+        """Stores the current state of the E-Graph as keyframe."""
+        position = len(self.entries)
+        if position != self._positions[-1]:
+            self._positions.append(position)
+        self.keyframes[position] = EGraphSnapshot(egraph)
+
+    def checkpoint(self, egraph):
+        """Stores a keyframe, if the last one is keyframe_interval entries ago.
+        The E-Graph must not be in the middle of a merge or repair.
+        """
+        if len(self.entries) - self._positions[-1] >= self.keyframe_interval:
+            self.keyframe(egraph)
+
+    def snapshot(self, position):
+        """Returns the E-Graph at a position as EGraphSnapshot.
+
+        :param position: Position in the journal (see ``position``).
+        :return: EGraphSnapshot
+        """
+        start = self._positions[bisect_right(self._positions, position) - 1]
+        if start == position:
+            return self.keyframes[start]
+        snapshot = self.keyframes[start].copy()
+        for entry in self.entries[start:position]:
+            snapshot.apply(entry)
+        return snapshot
+
+
+class TraceEvent:
+    """Class that represents one step of a rule application.
+
+    Attributes:
+        - message: Description of the step.
+        - rule: Name of the rule or None.
+        - eclass_ids: EClass-IDs the step refers to (coloured in DOT).
+        - environment: Dictionary with the following mapping:
+          variable -> EClass-ID, or None.
+        - counters: Dictionary with counters of the E-Graph.
+        - journal: Journal of the E-Graph (TRACE_FULL) or None.
+        - position: Position of the step in the journal or None.
+        - roots: EClass-IDs of the roots of the E-Graph.
+
+    Methods:
+        dot(hops=None, max_class_size=None, max_nodes=None)
+        json()
+    """
+
+    def __init__(
+        self, message, rule=None, eclass_ids=(), environment=None, counters=None,
+        journal=None, position=None, roots=(),
+    ):
+        """Initialises class. Takes one to eight arguments.
+
+        :param message: Description of the step.
+        :param rule: Name of the rule.
+        :param eclass_ids: EClass-IDs the step refers to.
+        :param environment: Mapping variable -> EClass-ID of the match.
+        :param counters: Counters of the E-Graph.
+        :param journal: Journal to reconstruct the step.
+        :param position: Position of the step in the journal.
+        :param roots: EClass-IDs of the roots of the E-Graph.
+        :returns: None.
+        """
+        self.message = message
+        self.rule = rule
+        self.eclass_ids = tuple(eclass_ids)
+        self.environment = environment
+        self.counters = counters or {}
+        self.journal = journal
+        self.position = position
+        self.roots = tuple(roots)
+
+    def dot(self, hops=None, max_class_size=None, max_nodes=None):
+        """Returns the E-Graph of the step in DOT notation or None. It is
+        reconstructed from the journal on every call. The options reduce
+        the rendered E-Graph (see Dot.py).
+        """
+        if self.journal is None:
+            return None
+        return self.journal.snapshot(self.position).to_dot(
+            marked_eclasses=self.eclass_ids,
+            roots=self.roots,
+            hops=hops,
+            max_class_size=max_class_size,
+            max_nodes=max_nodes,
+        )
+
+    def json(self):
+        """Returns the E-Graph of the step as JSON serialisable dictionary
+        (see GraphJson.py) or None. It is reconstructed like ``dot``.
+        """
+        if self.journal is None:
+            return None
+        return self.journal.snapshot(self.position).to_json(self.eclass_ids, self.roots)
+
+    def __len__(self):
+        """Returns 2 (message and DOT)."""
+        return 2
+
+    def __getitem__(self, index):
+        """Returns the message (index 0) or the DOT string (index 1)."""
+        if index in (0, -2):
+            return self.message
+        if index in (1, -1):
+            return self.dot()
+        raise IndexError("TraceEvent index out of range.")
+
+    def __str__(self):
+        """Returns the message."""
+        return self.message
+
+
+def record(events, egraph, trace, message, rule=None, eclass_ids=(), environment=None):
+    """Appends a TraceEvent for the current state of the E-Graph to events.
+    With TRACE_FULL, a journal is attached to the E-Graph if it has none.
+
+    :param events: List of TraceEvents.
+    :param egraph: The E-Graph.
+    :param trace: TRACE_OFF, TRACE_EVENTS or TRACE_FULL.
+    :param message: Description of the step.
+    :param rule: Name of the rule.
+    :param eclass_ids: EClass-IDs the step refers to.
+    :param environment: Mapping variable -> EClass-ID of the match.
+    :return: None
+    """
+    if trace == TRACE_OFF:
+        return
+    journal, position = None, None
+    if trace == TRACE_FULL:
+        if egraph.journal is None:
+            egraph.journal = Journal(egraph)
+        journal = egraph.journal
+        journal.checkpoint(egraph)
+        position = journal.position()
+    events.append(
+        TraceEvent(
+            message,
+            rule,
+            eclass_ids,
+            environment,
+            {
+                "eclasses": len(egraph.classes),
+                "enodes_added": egraph.enodes_added,
+                "unions_performed": egraph.unions_performed,
+            },
+            journal,
+            position,
+            egraph.roots,
+        )
+    )
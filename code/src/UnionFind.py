@@ -0,0 +1,65 @@
+"""This module implements a union-find datastructure for EClass-IDs.
+
+Classes:
+    UnionFind: Represents a union-find over dense integer EClass-IDs.
+"""
+
+from array import array
+
+
+class UnionFind:
+    """Class that represents a union-find datastructure.
+
+    The elements are dense integers (0, 1, 2, ...) handed out by ``make_set``.
+    Parent pointers and subset sizes are stored in compact integer arrays.
+    ``find`` uses path compression and ``union`` uses union by size.
+
+    Attributes:
+        - parents: array with the parent of every element.
+        - sizes: array with the size of the subset of every root element.
+    """
+
+    def __init__(self):
+        """Initialises class. Takes no arguments."""
+        self.parents = array("i")
+        self.sizes = array("i")
+
+    def __len__(self):
+        """Returns the number of elements."""
+        return len(self.parents)
+
+    def make_set(self):
+        """Adds a new singleton subset and returns its element."""
+        element = len(self.parents)
+        self.parents.append(element)
+        self.sizes.append(1)
+        return element
+
+    def find(self, element):
+        """Returns the root element of the subset containing element."""
+        parents = self.parents
+        root = element
+        while parents[root] != root:
+            root = parents[root]
+        while parents[element] != root:
+            parents[element], element = root, parents[element]
+        return root
+
+    def union(self, element1, element2):
+        """Merges the subsets of both elements and returns the new root."""
+        root1 = self.find(element1)
+        root2 = self.find(element2)
+        if root1 == root2:
+            return root1
+        if self.sizes[root1] < self.sizes[root2]:
+            root1, root2 = root2, root1
+        self.parents[root2] = root1
+        self.sizes[root1] += self.sizes[root2]
+        return root1
+
+    def subsets(self):
+        """Returns a list with all subsets (as sets of elements)."""
+        subsets = {}
+        for element in range(len(self.parents)):
+            subsets.setdefault(self.find(element), set()).add(element)
+        return list(subsets.values())
@@ -9,8 +9,12 @@ Paths:
     - ``/uploadrules``: POST
     - ``/createegraph``: POST
     - ``/loadegraph``: GET
+    - ``/loadegraphjson``: GET
     - ``/move``: POST
     - ``/extractterm``: POST
+    - ``/extracttopk``: POST
+    - ``/addroot``: POST
+    - ``/extractall``: POST
     - ``/exportegraph``: POST
     - ``/downloadsession``: POST
     - ``/uploadsession``: POST
@@ -151,6 +155,22 @@ def load_egraph():
     }
 
 
+@app.get("/loadegraphjson")
+def load_egraph_json():
+    """Returns the currently selected E-Graph as JSON object with the
+    E-Classes, E-Nodes and child edges (see GraphJson.py).
+
+    :return: JSON, {'response': ..., 'msg': ..., 'payload1': ..., 'payload2': ...}
+    """
+    result, msg, data = egraphService.get_current_egraph_json()
+    return {
+        "response": str(result),
+        "msg": msg,
+        "payload1": data[0],
+        "payload2": data[1],
+    }
+
+
 @app.post("/move")
 async def move(request: Request):
     """Steps forward/backward/fastforward/fastbackward in debug information.
@@ -210,16 +230,73 @@ async def extract_term():
     return {"response": str(result), "msg": msg, "payload": data}
 
 
+@app.post("/extracttopk")
+async def extract_top_k(request: Request):
+    """Extracts the k best terms from the current E-Graph and returns them.
+
+    :param request: JSON, {'payload': k}
+    :return: JSON, {"response": ..., "msg": ..., 'payload': [[term, cost], ...]}
+    """
+    payload = await request.body()
+    try:
+        k = int(json.loads(payload)["payload"])
+    except (JSONDecodeError, KeyError, TypeError, ValueError):
+        return {"response": "False", "msg": "Invalid k.", "payload": []}
+    result, msg, data = egraphService.extract_top_k(k)
+    return {"response": str(result), "msg": msg, "payload": data}
+
+
+@app.post("/addroot")
+async def add_root(request: Request):
+    """Adds another expression as root to the current E-Graph.
+
+    :param request: JSON, {'payload': ...}
+    :return: JSON, {"response": ..., "msg": ...}
+    """
+    payload = await request.body()
+    json_data = json.loads(payload)
+    result, msg = egraphService.add_root_expression(json_data["payload"])
+    return {"response": str(result), "msg": msg}
+
+
+@app.post("/extractall")
+async def extract_all(request: Request):
+    """Extracts the best terms of all roots and returns them.
+
+    :param request: JSON, {'share': bool, 'dag': None|'greedy'|'exact'} (optional)
+    :return: JSON, {"response": ..., "msg": ..., 'payload': {'terms': ..., 'bindings': ...}}
+    """
+    payload = await request.body()
+    try:
+        json_data = json.loads(payload)
+        share = json_data.get("share", False)
+        dag = json_data.get("dag")
+    except (JSONDecodeError, AttributeError):
+        share, dag = False, None
+    if not isinstance(share, bool):
+        return {"response": "False", "msg": "Invalid share flag.", "payload": {}}
+    if dag not in (None, DAG_GREEDY, DAG_EXACT):
+        return {"response": "False", "msg": "Invalid DAG mode.", "payload": {}}
+    result, msg, data = egraphService.extract_all(share=share, dag=dag)
+    return {"response": str(result), "msg": msg, "payload": data}
+
+
 @app.post("/exportegraph")
 async def export_egraph(request: Request):
     """Exports current E-Graph into one format.
 
-    :param request: JSON, {'payload': ...}
+    :param request: JSON, {'payload': ..., 'hops': int, 'max_class_size': int,
+        'max_nodes': int} (options are optional)
     :return: JSON, {"response": ..., "msg": ...}
     """
     payload = await request.body()
     json_data = json.loads(payload)
-    result, msg = egraphService.export(json_data["payload"])
+    result, msg = egraphService.export(
+        json_data["payload"],
+        hops=json_data.get("hops"),
+        max_class_size=json_data.get("max_class_size"),
+        max_nodes=json_data.get("max_nodes"),
+    )
     return {"response": str(result), "msg": msg}
 
 
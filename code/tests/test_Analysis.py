@@ -0,0 +1,82 @@
+"""This file contains tests to ensure the capability and correctness of Analysis.py
+The tests are separated into groups to test different aspects of Analysis.py.
+
+- Number of Tests: 6
+
+"""
+
+import AbstractSyntaxTree
+import Analysis
+import EGraph
+import EGraphService
+import RewriteRule
+
+
+################################################################################
+# Analysis                              ########################################
+################################################################################
+
+
+def test_analysis_1():
+    analysis = Analysis.Analysis()
+    egraph = EGraph.EGraph(analysis)
+    eterm_id = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ 2 3)").root_node)
+    assert egraph.m[eterm_id].data is None
+    assert analysis.merge(None, 1) == 1 and analysis.merge(2, None) == 2
+    assert len(egraph.h) == 3
+
+
+################################################################################
+# Constant folding                      ########################################
+################################################################################
+
+
+def test_constant_folding_1():
+    egraph = EGraph.EGraph(Analysis.ConstantFolding())
+    eterm_id = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a (+ 2 3))").root_node)
+    egraph.rebuild()
+    assert egraph.m[egraph._find(egraph.h[EGraph.ENode("5", [])])].data == 5
+    assert egraph.m[egraph._find(eterm_id)].data is None
+    assert EGraph._extract_term(eterm_id, egraph) == "(* a 5)"
+
+
+def test_constant_folding_2():
+    egraph = EGraph.EGraph(Analysis.ConstantFolding())
+    eterm_id = egraph.add_node(
+        AbstractSyntaxTree.AbstractSyntaxTree("(+ (- 1 3) (/ 7 2))").root_node
+    )
+    egraph.rebuild()
+    id_sub = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(- 1 3)").root_node)
+    assert egraph.m[egraph._find(id_sub)].data == -2
+    assert egraph.m[egraph._find(eterm_id)].data is None
+    assert EGraph.ENode("0", []) not in egraph.h
+
+
+def test_constant_folding_3():
+    egraph = EGraph.EGraph(Analysis.ConstantFolding())
+    eterm_id = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(- (* b 2) 1)").root_node)
+    id_b = egraph.h[EGraph.ENode("b", [])]
+    egraph.merge(id_b, egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(<< 1 2)").root_node))
+    egraph.rebuild()
+    assert egraph.m[egraph._find(eterm_id)].data == 7
+    assert EGraph._extract_term(eterm_id, egraph) == "7"
+
+
+def test_constant_folding_4():
+    egraph = EGraph.EGraph(Analysis.ConstantFolding(max_shift=8))
+    eterm_id = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(<< 1 100)").root_node)
+    assert egraph.m[egraph._find(eterm_id)].data is None
+    eterm_id = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(>> 256 8)").root_node)
+    assert egraph.m[egraph._find(eterm_id)].data == 1
+
+
+def test_constant_folding_5():
+    egraph = EGraph.EGraph(Analysis.ConstantFolding())
+    eterm_id = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* (+ a 0) (- 6 2))").root_node)
+    rules = [RewriteRule.RewriteRule("zero", "(+ x 0)", "(x)")]
+    egraph, dbg, best = EGraph.equality_saturation(rules, eterm_id, egraph)
+    assert best == "(* a 4)"
+    service = EGraphService.EGraphService()
+    service.create_egraph("(* (+ a 0) (- 6 2))", Analysis.ConstantFolding())
+    service.add_rule("(+ x 0)", "(x)")
+    assert service.extract()[2] == "(* a 4)"
@@ -0,0 +1,97 @@
+"""This file contains tests to ensure the capability and correctness of CostFunction.py
+The tests are separated into groups to test different aspects of CostFunction.py.
+
+- Number of Tests: 7
+
+"""
+
+import pytest
+import AbstractSyntaxTree
+import CostFunction
+import EGraph
+import RewriteRule
+
+
+################################################################################
+# Cost functions                        ########################################
+################################################################################
+
+
+def test_cost_function_1():
+    cost_function = CostFunction.OperatorWeights()
+    assert cost_function.node_cost("*") == 2
+    assert cost_function.node_cost("a") == 0
+    assert cost_function.enode_cost("/", [2, 1]) == 6
+    assert str(cost_function) == "['+'|'-'|'<<'|'>>']: 1, ['*']: 2, ['/']: 3, [other]: 0"
+
+
+def test_cost_function_2():
+    assert CostFunction.AstSize().enode_cost("+", [3, 1]) == 5
+    assert CostFunction.AstDepth().enode_cost("+", [3, 1]) == 4
+    assert CostFunction.AstDepth().enode_cost("a", []) == 1
+    assert CostFunction.OperatorWeights() == CostFunction.OperatorWeights()
+    assert CostFunction.AstSize() != CostFunction.AstDepth()
+    with pytest.raises(ValueError):
+        CostFunction.CostFunction("invalid", combine="min")
+
+
+def test_cost_function_3():
+    with pytest.raises(ValueError):
+        CostFunction.OperatorWeights({"*": -1})
+    with pytest.raises(ValueError):
+        CostFunction.CostFunction("negative default", default=-1)
+    # Zero weights are fine, e.g. for leaves.
+    assert CostFunction.CostFunction("zero", {"+": 0}).enode_cost("+", [0, 0]) == 0
+
+
+################################################################################
+# Extraction with cost functions        ########################################
+################################################################################
+
+
+def test_extraction_cost_function_1():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ a a)").root_node)
+    g.merge(id1, id2)
+    assert EGraph._extract_term(id1, g) == "(+ a a)"
+    weights = CostFunction.OperatorWeights({"*": 1, "+": 4})
+    assert EGraph._extract_term(id1, g, weights) == "(* a 2)"
+    assert g.extraction.cost_function == weights
+
+
+def test_extraction_cost_function_2():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (+ (+ a b) c) d)").root_node)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (+ a b) (+ c d))").root_node)
+    g.merge(id1, id2)
+    assert EGraph._extract_term(id1, g, CostFunction.AstDepth()) == "(+ (+ a b) (+ c d))"
+    assert g.extraction.costs[g._find(id1)][0] == 3
+    assert EGraph._extract_term(id1, g, CostFunction.AstSize()) in (
+        "(+ (+ (+ a b) c) d)",
+        "(+ (+ a b) (+ c d))",
+    )
+    assert g.extraction.costs[g._find(id1)][0] == 7
+
+
+def test_extraction_cost_function_3():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    cost_function = CostFunction.OperatorWeights({"*": 1, "<<": 5})
+    egraph, dbg, best = EGraph.equality_saturation(
+        rules, eterm_id, g, cost_function=cost_function
+    )
+    assert best == "(* a 2)"
+    assert dbg[0][0] == "Cost model: " + str(cost_function)
+
+
+def test_extraction_cost_function_4():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    egraph, dbg, best = EGraph.equality_saturation(
+        rules, eterm_id, g, cost_function=CostFunction.AstSize()
+    )
+    assert best in ("(* a 2)", "(<< a 1)")
+    assert egraph.extraction.costs[egraph._find(eterm_id)][0] == 3
@@ -0,0 +1,127 @@
+"""This file contains tests to ensure the capability and correctness of Dot.py
+The tests are separated into groups to test different aspects of Dot.py.
+
+- Number of Tests: 8
+
+"""
+
+import AbstractSyntaxTree
+import Dot
+import EGraph
+import RewriteRule
+
+
+################################################################################
+# Rendering                             ########################################
+################################################################################
+
+
+def test_dot_1():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) (* a 2))").root_node)
+    dot = Dot.eclasses_to_dot(g.classes, g._find)
+    assert dot.startswith("digraph parent")
+    assert dot.count("subgraph") == 4
+    assert '"+3":30 -> "*2" [lhead="cluster-2"]' in dot
+    assert '"+3":31 -> "*2" [lhead="cluster-2"]' in dot
+    assert '"*2":20 -> "a" [lhead="cluster-0"]' in dot
+    assert '"*2":21 -> "2" [lhead="cluster-1"]' in dot
+
+
+def test_dot_2():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 1)").root_node)
+    g.merge(eterm_id, 0)
+    g.rebuild()
+    dot = Dot.eclasses_to_dot(g.classes, g._find)
+    # The first argument of (* a 1) points into its own E-Class now.
+    assert '"*1":10 -> "point-0" [dir=none]' in dot
+    assert '"point-0" -> "*1" [lhead="cluster-' in dot
+    assert '"*1":11 -> "1" [lhead="cluster-1"]' in dot
+    assert dot.count("shape=point") == 1
+
+
+def test_dot_3():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* x x)").root_node)
+    g.merge(eterm_id, 0)
+    g.rebuild()
+    dot = Dot.eclasses_to_dot(g.classes, g._find)
+    # The second self-loop starts at the second port.
+    assert '"*0":00 -> "point-0" [dir=none]' in dot
+    assert '"*0":01 -> "point-1" [dir=none]' in dot
+    assert dot == Dot.eclasses_to_dot(g.classes, g._find)
+
+
+################################################################################
+# Cache                                 ########################################
+################################################################################
+
+
+def test_dot_cache_1():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    dot = g.egraph_to_dot()
+    assert g.egraph_to_dot() is dot
+    assert g.egraph_to_dot(marked_eclasses=[eterm_id]) != dot
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    g, _ = EGraph.apply_rules(rules, g)
+    assert g.egraph_to_dot() != dot
+    assert g.egraph_to_dot() == Dot.eclasses_to_dot(g.classes, g._find)
+
+
+def test_dot_cache_2():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ a b)").root_node)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ a c)").root_node)
+    before = g.egraph_to_dot(marked_eclasses=[id1])
+    g.merge(id1, id2)
+    # Marked E-Classes are canonicalised.
+    assert g.egraph_to_dot(marked_eclasses=[id1]) == g.egraph_to_dot(marked_eclasses=[id2])
+    assert g.egraph_to_dot(marked_eclasses=[id1]) != before
+
+
+################################################################################
+# Level of detail                       ########################################
+################################################################################
+
+
+def test_dot_hops_1():
+    g = EGraph.EGraph()
+    root = g.add_root(g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) b)").root_node))
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(- c d)").root_node)
+    assert g.egraph_to_dot(hops=0).count("subgraph") == 1
+    dot = g.egraph_to_dot(hops=1)
+    assert dot.count("subgraph") == 3
+    assert '"+2":21 -> "b" [lhead="cluster-3"]' in dot
+    assert '"*0":00' not in dot
+    assert g.egraph_to_dot(hops=2).count("subgraph") == 5
+    # Marked E-Classes replace the roots as centers.
+    assert g.egraph_to_dot(marked_eclasses=[6], hops=1).count("subgraph") == 2
+    assert g.egraph_to_dot().count("subgraph") == 8
+    assert root == 4
+
+
+def test_dot_max_class_size_1():
+    g = EGraph.EGraph()
+    id1 = g.add_root(g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ a b)").root_node))
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ b a)").root_node)
+    id3 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* c (+ a b))").root_node)
+    g.merge(id1, id2)
+    g.rebuild()
+    dot = g.egraph_to_dot(max_class_size=1)
+    summary = '"summary-' + str(g._find(id1)) + '"'
+    assert summary + '[label="2 E-Nodes"' in dot
+    # The edges of the collapsed E-Class are omitted.
+    assert '-> "a"' not in dot and '-> "b"' not in dot
+    assert '1 -> ' + summary + ' [lhead="cluster-' + str(g._find(id1)) + '"]' in dot
+    assert g._find(id3) != g._find(id1)
+
+
+def test_dot_max_nodes_1():
+    g = EGraph.EGraph()
+    g.add_root(g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) b)").root_node))
+    dot = g.egraph_to_dot(max_nodes=3)
+    assert dot.count("subgraph") == 3
+    assert '"+2"' in dot and '"*0"' in dot and '"b"' in dot
+    assert g.egraph_to_dot(max_nodes=0).count("subgraph") == 0
@@ -1,15 +1,19 @@
 """This file contains tests to ensure the capability and correctness of EGraph.py
 The tests are separated into groups to test different aspects of EGraph.py.
 
-- Number of Tests: 25
+- Number of Tests: 61
 
 """
 
 import os
 import pytest
+import random
 import AbstractSyntaxTree
+import CostFunction
 import EGraph
+import Extraction
 import RewriteRule
+import Runner
 
 
 ################################################################################
@@ -109,6 +113,133 @@ def test_egraph_general_8():
     assert best == "a"
 
 
+def test_egraph_general_9():
+    ast = AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) (* a 2))")
+    g = EGraph.EGraph()
+    id1 = g.add_node(ast.root_node)
+    number_of_enodes = len(g.h)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) (* a 2))").root_node)
+    assert id1 == id2
+    assert len(g.h) == number_of_enodes == 4
+
+
+def test_egraph_general_10():
+    ast = AbstractSyntaxTree.AbstractSyntaxTree("(<< (* a 2) (- b 2))")
+    g = EGraph.EGraph()
+    g.add_node(ast.root_node)
+    assert sorted(g.m.keys()) == list(range(6))
+    id1 = g.merge(0, 1)
+    id2 = g.merge(1, 2)
+    assert id1 == id2 == g._find(0) == g._find(2)
+    assert len(g.u.subsets()) == 4
+
+
+def test_egraph_general_11():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(- (+ (* a 2) 1) c)").root_node)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(- (+ (* b 2) 1) c)").root_node)
+    id_a = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(a)").root_node)
+    id_b = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(b)").root_node)
+    g.merge(id_a, id_b)
+    g.rebuild()
+    assert g._find(id1) == g._find(id2)
+    assert not g.pending
+    assert len(g.h) == 8
+
+
+def test_egraph_general_12():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) b)").root_node)
+    assert g.enodes_added == 5 and g.unions_performed == 0
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    assert g.enodes_added == 5
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(b)").root_node)
+    g.merge(id1, id2)
+    g.merge(id1, id2)
+    assert g.enodes_added == 5 and g.unions_performed == 1
+
+
+def test_egraph_general_13():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* (+ a b) 2) (* (+ b a) 2))").root_node)
+    rules = [
+        RewriteRule.RewriteRule("commute", "(+ x y)", "(+ y x)"),
+        RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)"),
+        RewriteRule.RewriteRule("double", "(+ x x)", "(* x 2)"),
+    ]
+    g, dbg, best = EGraph.equality_saturation(rules, eterm_id, g)
+    eclasses = g.get_eclasses()
+    assert set(eclasses) == set(g.m) and len(eclasses) == g.number_of_eclasses()
+    assert sum(len(enodes) for enodes in eclasses.values()) == len(g.h)
+    for eclass_id, enodes in eclasses.items():
+        assert g._find(eclass_id) == eclass_id
+        for enode in enodes:
+            assert enode == g._canonicalize(enode) and g._find(g.h[enode]) == eclass_id
+    assert best in ("(<< (<< (+ a b) 1) 1)", "(<< (<< (+ b a) 1) 1)")
+
+
+def test_egraph_general_14():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(<< a 1)").root_node)
+    eclasses = g.get_eclasses()
+    with pytest.raises(TypeError):
+        eclasses[id1] = set()
+    new_id = g.merge(id1, id2)
+    old_id = id2 if new_id == id1 else id1
+    assert old_id not in g.m and old_id not in eclasses
+    assert len(eclasses[new_id]) == 2 and len(g.m[new_id].parents) == 0
+    assert g.pending and g.get_eclasses() is eclasses and not g.pending
+
+
+def _assert_canonical(g):
+    eclasses = g.get_eclasses()
+    for eclass_id, enodes in eclasses.items():
+        for enode in enodes:
+            assert enode == g._canonicalize(enode)
+            assert g._find(g.h[enode]) == eclass_id
+    assert g.number_of_enodes() == sum(len(enodes) for enodes in eclasses.values())
+
+
+def test_egraph_general_15():
+    g = EGraph.EGraph()
+    for expression in [
+        "(+ (+ (+ a (* b b)) (* (+ a c) (* c a))) a)",
+        "(+ (* d (* c b)) b)",
+        "(+ a a)",
+        "(+ a (+ a (+ (+ a d) a)))",
+    ]:
+        g.add_node(AbstractSyntaxTree.AbstractSyntaxTree(expression).root_node)
+    g.merge(1, 10)
+    g.merge(5, 3)
+    g.rebuild()
+    g.merge(11, 4)
+    g.merge(1, 4)
+    g.rebuild()
+    _assert_canonical(g)
+    g.compact()
+    _assert_canonical(g)
+
+
+def test_egraph_general_16():
+    # Cascading merges, the repaired E-Class itself can be absorbed.
+    for seed in range(100):
+        r = random.Random(seed)
+        g = EGraph.EGraph()
+        for _ in range(4):
+            leaves = [r.choice("abcd") for _ in range(4)]
+            g.add_node(
+                AbstractSyntaxTree.AbstractSyntaxTree(
+                    "(+ (* {} {}) (+ {} (* {} a)))".format(*leaves)
+                ).root_node
+            )
+        for _ in range(6):
+            g.merge(r.randrange(len(g.u)), r.randrange(len(g.u)))
+            if r.random() < 0.5:
+                g.rebuild()
+        _assert_canonical(g)
+
+
 ################################################################################
 # Extract                               ########################################
 ################################################################################
@@ -188,6 +319,257 @@ def test_extraction_6():
     assert "(+ a 2)" == EGraph._extract_term(etermid, g)
 
 
+def test_extraction_7():
+    g = EGraph.EGraph()
+    one = g._add(EGraph.ENode("1", []))
+    eterm_id = g._add(EGraph.ENode("a", []))
+    for _ in range(5000):
+        eterm_id = g._add(EGraph.ENode("+", [eterm_id, one]))
+    best = EGraph._extract_term(eterm_id, g)
+    assert best == "(+ " * 5000 + "a" + " 1)" * 5000
+
+
+def test_extraction_8():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(- (/ b 2) (* (* a 2) 1))").root_node)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(<< a 1)").root_node)
+    id3 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    id4 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* (* a 2) 1)").root_node)
+    g.merge(id2, id3)
+    g.merge(id3, id4)
+    assert EGraph._extract_term(id1, g) == "(- (/ b 2) (<< a 1))"
+
+
+def test_extraction_9():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(- (/ b 2) (* a 2))").root_node)
+    assert EGraph._extract_term(id1, g) == "(- (/ b 2) (* a 2))"
+    assert g.extraction.version == g.current_version()
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(<< a 1)").root_node)
+    g.merge(id2, g.h[EGraph.ENode("*", [g.h[EGraph.ENode("a", [])], g.h[EGraph.ENode("2", [])]])])
+    assert EGraph._extract_term(id1, g) == "(- (/ b 2) (<< a 1))"
+    assert g.extraction.costs[g._find(id1)][0] == 5
+
+
+def test_extraction_10():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(/ (* a 2) 2)").root_node)
+    rules = [
+        RewriteRule.RewriteRule("reassociate", "(/ (* x y) z)", "(* x (/ y z))"),
+        RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)"),
+        RewriteRule.RewriteRule("simplify", "(/ x x)", "(1)"),
+        RewriteRule.RewriteRule("simp", "(* x 1)", "(x)"),
+    ]
+    for _ in range(4):
+        g, debug_output = EGraph.apply_rules(rules, g)
+        incremental = EGraph._extract_term(eterm_id, g)
+        fresh = Extraction.ExtractionState().update(g)
+        assert {i: c for i, (c, _) in g.extraction.costs.items() if g._find(i) == i} == {
+            i: c for i, (c, _) in fresh.items()
+        }
+    assert incremental == "a"
+
+
+def test_extraction_11():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(/ (* a 2) 2)").root_node)
+    rules = [
+        RewriteRule.RewriteRule("reassociate", "(/ (* x y) z)", "(* x (/ y z))"),
+        RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)"),
+        RewriteRule.RewriteRule("simplify", "(/ x x)", "(1)"),
+        RewriteRule.RewriteRule("simp", "(* x 1)", "(x)"),
+    ]
+    g, dbg, best = EGraph.equality_saturation(rules, eterm_id, g)
+    terms = Extraction.extract_top_k(g, eterm_id, 4)
+    assert terms[0] == (0, best)
+    assert terms[1] == (2, "(* a 1)")
+    assert [cost for cost, _ in terms] == [0, 2, 4, 4]
+    assert len({term for _, term in terms}) == 4
+
+
+def test_extraction_12():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ a b)").root_node)
+    assert Extraction.extract_top_k(g, eterm_id, 5) == [(1, "(+ a b)")]
+    one = g._add(EGraph.ENode("1", []))
+    chain = g._add(EGraph.ENode("a", []))
+    for _ in range(2000):
+        chain = g._add(EGraph.ENode("*", [chain, one]))
+    assert Extraction.extract_top_k(g, chain, 1) == [(4000, "(* " * 2000 + "a" + " 1)" * 2000)]
+
+
+def test_extraction_13():
+    g = EGraph.EGraph()
+    id1 = g.add_root(g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(/ (+ a b) (+ a b))").root_node))
+    id2 = g.add_root(g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* (+ a b) c)").root_node))
+    g.add_root(id1)
+    assert g.roots == [id1, id2]
+    terms, bindings = EGraph._extract_terms(g.roots, g)
+    assert terms == ["(/ (+ a b) (+ a b))", "(* (+ a b) c)"] and bindings == []
+    terms, bindings = EGraph._extract_terms(g.roots, g, share=True)
+    assert terms == ["(/ $0 $0)", "(* $0 c)"]
+    assert bindings == [("$0", "(+ a b)")]
+
+
+def _egraph_with_shared_subterm():
+    g = EGraph.EGraph()
+    root = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (+ (/ a b) c) (- (/ a b) d))").root_node)
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (/ a b) c)").root_node)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a c)").root_node)
+    g.merge(id1, id2)
+    g.rebuild()
+    return g, root
+
+
+def test_extraction_14():
+    g, root = _egraph_with_shared_subterm()
+    assert EGraph._extract_term(root, g) == "(+ (* a c) (- (/ a b) d))"
+    cost, terms, bindings, optimal = EGraph._extract_dag([root], g)
+    assert cost == 6 and not optimal
+    assert terms == ["(+ (+ $0 c) (- $0 d))"]
+    assert bindings == [("$0", "(/ a b)")]
+
+
+def test_extraction_15():
+    g, root = _egraph_with_shared_subterm()
+    cost, terms, bindings, optimal = EGraph._extract_dag([root], g, mode=Extraction.DAG_EXACT)
+    assert cost == 6 and optimal
+    cost, _, _, optimal = EGraph._extract_dag([root], g, mode=Extraction.DAG_EXACT, node_budget=1)
+    assert cost == 6 and not optimal
+
+
+def test_extraction_16():
+    g = EGraph.EGraph()
+    root = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 1)").root_node)
+    g.merge(root, g.h[EGraph.ENode("a", [])])
+    g.rebuild()
+    for mode in (Extraction.DAG_GREEDY, Extraction.DAG_EXACT):
+        assert EGraph._extract_dag([root], g, mode=mode)[:3] == (0, ["a"], [])
+    with pytest.raises(ValueError):
+        EGraph._extract_dag([root], g, mode="tree")
+
+
+def test_extraction_17():
+    g = EGraph.EGraph()
+    root = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ p q)").root_node)
+    g.merge(root, g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* p p)").root_node))
+    cost_function = CostFunction.CostFunction("t", {"+": 1, "*": 3, "p": 1, "q": 5})
+    assert EGraph._extract_term(root, g, cost_function) == "(* p p)"
+    # q becomes as cheap as p, which makes (+ p q) cheaper than (* p p).
+    g.merge(0, 1)
+    g.rebuild()
+    assert EGraph._extract_term(root, g, cost_function) == "(+ p p)"
+    assert g.extraction.costs[g._find(root)][0] == 3
+
+
+def test_extraction_18():
+    cost_function = CostFunction.CostFunction("t", {"+": 1, "*": 3, "q": 5, "r": 2}, default=1)
+    for seed in range(100):
+        r = random.Random(seed)
+        g = EGraph.EGraph()
+        for _ in range(3):
+            leaves = [r.choice("pqr") for _ in range(4)]
+            g.add_node(
+                AbstractSyntaxTree.AbstractSyntaxTree(
+                    "(+ (* {} {}) (+ {} {}))".format(*leaves)
+                ).root_node
+            )
+        for _ in range(4):
+            g.extraction.update(g, cost_function)
+            g.merge(r.randrange(len(g.u)), r.randrange(len(g.u)))
+            costs = g.extraction.update(g, cost_function)
+            fresh = Extraction.ExtractionState().update(g, cost_function)
+            assert {i: c[0] for i, c in costs.items()} == {i: c[0] for i, c in fresh.items()}
+
+
+def test_extraction_19():
+    g = EGraph.EGraph()
+    root = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ q b)").root_node)
+    q = g.h[EGraph.ENode("q", [])]
+    g.merge(q, g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* c c)").root_node))
+    g.merge(q, g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(r)").root_node))
+    g.rebuild()
+    cost_function = CostFunction.CostFunction(
+        "t", {"+": 1, "*": 1, "q": 3, "r": 10, "c": 3, "b": 0}
+    )
+    # A complete but more expensive choice must not replace the best one.
+    for mode in (Extraction.DAG_GREEDY, Extraction.DAG_EXACT):
+        assert EGraph._extract_dag([root], g, cost_function, mode)[:3] == (4, ["(+ q b)"], [])
+
+
+def test_extraction_20():
+    class CountingWeights(CostFunction.OperatorWeights):
+        calls = 0
+
+        def node_cost(self, key):
+            CountingWeights.calls += 1
+            return super().node_cost(key)
+
+    r = random.Random(0)
+
+    def term(depth):
+        if depth == 0:
+            return r.choice(["a", "b", "c", "d", "1", "2"])
+        return "(" + r.choice("+*-") + " " + term(depth - 1) + " " + term(depth - 1) + ")"
+
+    g = EGraph.EGraph()
+    for _ in range(60):
+        g.add_root(g.add_node(AbstractSyntaxTree.AbstractSyntaxTree(term(4)).root_node))
+    rules = [
+        RewriteRule.RewriteRule("1", "(+ x y)", "(+ y x)"),
+        RewriteRule.RewriteRule("2", "(* x y)", "(* y x)"),
+        RewriteRule.RewriteRule("3", "(* x 2)", "(<< x 1)"),
+        RewriteRule.RewriteRule("4", "(* x 1)", "(x)"),
+        RewriteRule.RewriteRule("5", "(+ x (+ y z))", "(+ (+ x y) z)"),
+    ]
+    for _ in range(2):
+        g, _ = EGraph.apply_rules(rules, g)
+    g.rebuild()
+    cost_function = CountingWeights()
+    cost, choices, _ = Extraction.extract_dag(g, g.roots, cost_function)
+    roots = list(dict.fromkeys(g._find(root) for root in g.roots))
+    assert cost == Extraction._dag_cost(
+        choices, roots, lambda enode: cost_function.node_cost(enode.key)
+    )
+    # The refinement must not recompute the whole DAG for every alternative
+    # E-Node (about 670000 calls on this E-Graph).
+    assert g.number_of_enodes() > 1000
+    assert CountingWeights.calls < 20 * g.number_of_enodes()
+
+
+################################################################################
+# Compaction                            ########################################
+################################################################################
+
+
+def test_compact_1():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) b)").root_node)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(<< a 1)").root_node)
+    g.add_root(id1)
+    g.merge(g.h[EGraph.ENode("*", [0, 1])], id2)
+    mapping = g.compact()
+    assert len(g.m) == g.number_of_eclasses() == 6
+    assert sorted(g.m.keys()) == list(range(6)) == sorted(mapping.values())
+    assert g.roots == [mapping[id1]] and not g.search_versions
+    assert EGraph._extract_term(g.roots[0], g) == "(+ (<< a 1) b)"
+    assert g.current_version() == 6 and len(g.h) == 7
+
+
+def test_compact_2():
+    g = EGraph.EGraph()
+    eterm_id = g.add_root(g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node))
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    g, dbg = EGraph.equality_saturation_no_extract(rules, eterm_id, g)
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(- (+ a d) 1)").root_node)
+    assert g.number_of_eclasses() == 7
+    mapping = g.compact(prune=True)
+    assert sorted(mapping.values()) == [0, 1, 2, 3]
+    assert g.number_of_eclasses() == len(g.m) == 4 and len(g.h) == 5
+    assert g.compact(prune=True) == {0: 0, 1: 1, 2: 2, 3: 3}
+    assert EGraph._extract_term(g.roots[0], g) == "(<< a 1)"
+
+
 ################################################################################
 # E-Matching                            ########################################
 ################################################################################
@@ -247,7 +629,106 @@ def test_e_matching_5():
         if enode.key == "b":
             enode_b = enode
     list_of_matches = egraph._ematch(eclasses, r.expr_lhs.root_node)
-    assert str(egraph.h[enode_b]) in list_of_matches[0][1].values()
+    assert egraph.h[enode_b] in list_of_matches[0][1].values()
+
+
+def test_e_matching_6():
+    ast = AbstractSyntaxTree.AbstractSyntaxTree("(/ (* a 2) (+ (* b 2) 2))")
+    egraph = EGraph.EGraph()
+    egraph.add_node(ast.root_node)
+    assert len(egraph._eclasses_with_key("*")) == 2
+    assert len(egraph._eclasses_with_key("/")) == 1
+    assert egraph._eclasses_with_key("<<") == set()
+    egraph.merge(egraph.h[EGraph.ENode("a", [])], egraph.h[EGraph.ENode("b", [])])
+    egraph.rebuild()
+    assert len(egraph._eclasses_with_key("*")) == 1
+    r = RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")
+    list_of_matches = egraph._ematch(egraph.get_eclasses(), r.expr_lhs.root_node)
+    assert len(list_of_matches) == 1
+
+
+def test_e_matching_7():
+    ast = AbstractSyntaxTree.AbstractSyntaxTree("(+ (/ a a) (/ a b))")
+    egraph = EGraph.EGraph()
+    egraph.add_node(ast.root_node)
+    r = RewriteRule.RewriteRule("simplify", "(/ x x)", "(1)")
+    assert r.lhs_pattern.root_key == "/"
+    assert r.lhs_pattern.variables == ("x",)
+    list_of_matches = egraph._ematch(egraph.get_eclasses(), r.lhs_pattern)
+    assert len(list_of_matches) == 1
+
+
+def test_e_matching_8():
+    egraph = EGraph.EGraph()
+    id1 = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    id2 = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* b 2)").root_node)
+    egraph.merge(id1, id2)
+    egraph.rebuild()
+    r = RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")
+    list_of_matches = egraph._ematch(egraph.get_eclasses(), r.lhs_pattern)
+    assert len(list_of_matches) == 2
+    for eclass_id, environment in list_of_matches:
+        egraph.merge(eclass_id, egraph._substitute(r.rhs_pattern, environment))
+    egraph.rebuild()
+    assert len(egraph.get_eclasses()[egraph._find(id1)]) == 4
+
+
+def test_e_matching_9():
+    egraph = EGraph.EGraph()
+    egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) (* b 3))").root_node)
+    r = RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")
+    version = egraph.current_version()
+    assert egraph._ematch(egraph.get_eclasses(), r.lhs_pattern, egraph.dirty_since(version)) == []
+    id_c = egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* c 2)").root_node)
+    dirty = egraph.dirty_since(version)
+    list_of_matches = egraph._ematch(egraph.get_eclasses(), r.lhs_pattern, dirty)
+    assert [eclass_id for eclass_id, _ in list_of_matches] == [id_c]
+
+
+def test_e_matching_10():
+    egraph = EGraph.EGraph()
+    egraph.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) (* b 3))").root_node)
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    egraph, debug_output = EGraph.apply_rules(rules, egraph, incremental=True)
+    egraph, debug_output = EGraph.apply_rules(rules, egraph, incremental=True)
+    number_of_enodes = len(egraph.h)
+    assert rules[0] in egraph.search_versions
+    egraph, debug_output = EGraph.apply_rules(rules, egraph, incremental=True)
+    assert debug_output[0][0].startswith("No MATCH")
+    assert len(egraph.h) == number_of_enodes
+
+
+def test_e_matching_11():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a b) (* a c))").root_node)
+    r = RewriteRule.RewriteRule("factor", "(+ (* x y) (* x z))", "(* x (+ y z))")
+    memo = {}
+    environment = g._ematch(g.get_eclasses(), r.lhs_pattern)[0][1]
+    id1 = g._substitute(r.rhs_pattern, environment, memo)
+    number_of_enodes = len(g.h)
+    assert len(memo) == 2
+    calls = []
+    add = g._add
+    g._add = lambda enode: calls.append(enode) or add(enode)
+    assert g._substitute(r.rhs_pattern, dict(environment), memo) == id1
+    assert calls == [] and len(g.h) == number_of_enodes
+    swapped = {"x": environment["x"], "y": environment["z"], "z": environment["y"]}
+    g._substitute(r.rhs_pattern, swapped, memo)
+    assert len(calls) == 2 and len(memo) == 4
+
+
+def test_e_matching_12():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (* a 2) (* b 2))").root_node)
+    rules = [RewriteRule.RewriteRule("commute", "(+ x y)", "(+ y x)")]
+    g, debug_output = EGraph.apply_rules(rules, g)
+    assert len(g.applied_matches) == 1
+    g, debug_output = EGraph.apply_rules(rules, g)
+    assert len(g.applied_matches) == 2
+    number_of_enodes = len(g.h)
+    g, debug_output = EGraph.apply_rules(rules, g)
+    assert len(g.applied_matches) == 2 and len(g.h) == number_of_enodes
+    assert not any(info[0].startswith("Rule commute: M") for info in debug_output)
 
 
 ################################################################################
@@ -353,3 +834,96 @@ def test_edge_case_2():
     ]
     egraph, dbg, best = EGraph.equality_saturation(rules, eterm_id, egraph)
     assert best == "a"
+
+
+################################################################################
+# Limits                                ########################################
+################################################################################
+
+
+def test_limits_1():
+    ast = AbstractSyntaxTree.AbstractSyntaxTree("(+ a (+ b c))")
+    egraph = EGraph.EGraph()
+    eterm_id = egraph.add_node(ast.root_node)
+    rules = [
+        RewriteRule.RewriteRule("switch", "(+ x y)", "(+ y x)"),
+        RewriteRule.RewriteRule("assoc", "(+ x (+ y z))", "(+ (+ x y) z)"),
+    ]
+    limits = Runner.RunnerLimits(node_limit=6)
+    egraph, dbg, report = EGraph.run_equality_saturation(rules, eterm_id, egraph, limits=limits)
+    assert report.stop_reason == Runner.NODE_LIMIT
+    assert report.iterations == 1
+    assert report.number_of_enodes == egraph.number_of_enodes() == 7
+    assert report.best_term == EGraph._extract_term(eterm_id, egraph)
+
+
+def test_limits_2():
+    ast = AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)")
+    egraph = EGraph.EGraph()
+    eterm_id = egraph.add_node(ast.root_node)
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    limits = Runner.RunnerLimits(iteration_limit=0)
+    egraph, dbg, report = EGraph.run_equality_saturation(rules, eterm_id, egraph, limits=limits)
+    assert report.stop_reason == Runner.ITERATION_LIMIT
+    assert report.best_term == "(* a 2)"
+    limits = Runner.RunnerLimits(iteration_limit=None, time_limit=None)
+    egraph, dbg, report = EGraph.run_equality_saturation(rules, eterm_id, egraph, limits=limits)
+    assert report.stop_reason == Runner.SATURATED
+    assert report.best_term == "(<< a 1)"
+    assert report.number_of_eclasses == egraph.number_of_eclasses() == 4
+
+
+################################################################################
+# Conditional and computed rules        ########################################
+################################################################################
+
+
+def test_conditional_rule_1():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ (/ a a) (/ 2 2))").root_node)
+    rule = RewriteRule.RewriteRule(
+        "simplify", "(/ x x)", "(1)", RewriteRule.is_nonzero_constant("x")
+    )
+    assert str(rule) == "[simplify: (/ x x) => (1) if is_nonzero_constant(x)]"
+    number_of_enodes = len(g.h)
+    g, debug_output = EGraph.apply_rules([rule], g)
+    assert len(g.h) == number_of_enodes + 1
+    assert EGraph._extract_term(eterm_id, g) == "(+ (/ a a) 1)"
+
+
+def test_conditional_rule_2():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ a 0)").root_node)
+    calls = []
+
+    def never(egraph, eclass_id, environment):
+        calls.append(environment)
+        return False
+
+    rule = RewriteRule.RewriteRule("commute", "(+ x y)", "(+ y x)", never)
+    number_of_enodes = len(g.h)
+    g, debug_output = EGraph.apply_rules([rule], g)
+    assert len(calls) == 1 and len(g.h) == number_of_enodes
+    assert debug_output[0][0].startswith("No MATCH")
+    rule = RewriteRule.RewriteRule("commute", "(+ x y)", "(+ y x)", RewriteRule.eclass_size_below("x", 1))
+    g, debug_output = EGraph.apply_rules([rule], g)
+    assert len(g.h) == number_of_enodes
+
+
+def test_computed_rule_1():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* (* a 8) (* b 3))").root_node)
+
+    def mul_to_shift(egraph, eclass_id, environment):
+        value = RewriteRule._constant_value(egraph, environment["y"])
+        if value & (value - 1):
+            return None
+        shift = egraph._add(EGraph.ENode(str(value.bit_length() - 1), []))
+        return egraph._add(EGraph.ENode("<<", [environment["x"], shift]))
+
+    rule = RewriteRule.RewriteRule("shift", "(* x y)", mul_to_shift, RewriteRule.is_constant("y"))
+    assert rule.rhs_pattern is None
+    assert str(rule) == "[shift: (* x y) => mul_to_shift if is_constant(y)]"
+    egraph, dbg, best = EGraph.equality_saturation([rule], eterm_id, g)
+    assert best == "(* (<< a 3) (* b 3))"
+
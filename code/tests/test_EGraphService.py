@@ -1,11 +1,13 @@
 """This file contains tests to ensure the capability and correctness of EGraphService.py
 The tests are separated into groups to test different aspects of EGraphService.py.
 
-- Number of Tests: 33
+- Number of Tests: 49
 
 """
 
 import EGraphService
+import RewriteRule
+import Runner
 import pytest
 
 
@@ -66,6 +68,7 @@ def test_service_general_1():
     _, _, term = service.extract()
     assert term == "(* 0 (* (+ a (<< a 1)) 1))"
 
+
 @pytest.mark.skip(
     reason="Run this test manually. Test may take longer (~ 20 seconds)."
 )
@@ -81,6 +84,158 @@ def test_service_general_2():
     assert term == "a"
 
 
+def test_service_general_3():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(* a 2)")
+    service.add_rule("(* x 2)", "(<< x 1)")
+    _, msg, term = service.extract(Runner.RunnerLimits(iteration_limit=0))
+    assert term == "(* a 2)"
+    assert "Stopped: iteration limit after 0 iteration(s)" in msg
+    _, msg = service.apply_all_rules()
+    assert "graph saturated" in msg
+
+
+def test_service_general_4():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(* a 2)")
+    service.add_rule("(* x 2)", "(<< x 1)")
+    service.apply_all_rules()
+    result, msg, terms = service.extract_top_k(3)
+    assert result and msg == "Extracted 2 best term(s)."
+    assert terms == [["(<< a 1)", 1], ["(* a 2)", 2]]
+
+
+def test_service_general_5():
+    service = EGraphService.EGraphService()
+    result, _, terms = service.extract_top_k(3)
+    assert not result and terms == []
+    service.create_egraph("(* a 2)")
+    result, _, terms = service.extract_top_k(0)
+    assert not result and terms == []
+
+
+def test_service_general_6():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(+ (* a 2) b)")
+    assert service.add_root_expression("(- c (* a 2))")[0]
+    service.add_rule("(* x 2)", "(<< x 1)")
+    result, _, data = service.extract_all()
+    assert result
+    assert data == {"terms": ["(+ (<< a 1) b)", "(- c (<< a 1))"], "bindings": []}
+    _, _, data = service.extract_all(share=True)
+    assert data == {"terms": ["(+ $0 b)", "(- c $0)"], "bindings": [["$0", "(<< a 1)"]]}
+
+
+def test_service_general_7():
+    service = EGraphService.EGraphService()
+    assert not service.add_root_expression("(+ a b)")[0]
+    assert not service.extract_all()[0]
+    service.create_egraph("(+ a b)")
+    assert not service.add_root_expression("(+ a")[0]
+
+
+def test_service_general_8():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(+ (/ a b) c)")
+    service.add_root_expression("(- (/ a b) d)")
+    service.add_root_expression("(* a c)")
+    result, _, data = service.extract_all(dag=EGraphService.DAG_GREEDY)
+    assert result
+    assert data["terms"] == ["(+ $0 c)", "(- $0 d)", "(* a c)"]
+    assert data["bindings"] == [["$0", "(/ a b)"]]
+
+
+def test_service_general_9():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(+ (/ a a) (/ 3 3))")
+    service.add_rule("(/ x x)", "(1)", RewriteRule.is_nonzero_constant("x"), bidirectional=False)
+    assert len(service.dict_of_rules) == 1
+    _, _, term = service.extract()
+    assert term == "(+ (/ a a) 1)"
+
+
+def test_service_general_10():
+    service = EGraphService.EGraphService()
+    assert not service.compact()[0]
+    service.create_egraph("(* a 2)")
+    service.add_root_expression("(- b c)")
+    service.egraph[0].roots.pop()
+    result, msg = service.compact(prune=True)
+    assert result and msg == "Compacted EGraph: 6 -> 3 E-Classes."
+    assert service.extract()[2] == "(* a 2)"
+
+
+def test_service_general_11():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(* a 2)")
+    service.add_rule("(* x 2)", "(<< x 1)")
+    service.apply([0])
+    assert service.egraphs._cache == {}
+    service.move_fastforward()
+    result, msg, data = service.get_current_egraph()
+    assert data[0] == "Done." and data[1].startswith("digraph")
+    assert list(service.egraphs._cache) == [(service.current_major, service.current_minor)]
+
+
+def test_service_general_12():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(* a 2)")
+    service.add_rule("(* x 2)", "(<< x 1)")
+    service.apply_all_rules()
+    events = service.egraphs[1]
+    assert all(isinstance(event.position, int) for event in events)
+    service.egraphs.cache_size = 2
+    service.move_fastforward()
+    while service.current_major != 0:
+        assert service.get_current_egraph()[2][1].startswith("digraph")
+        service.move_backward()
+    assert len(events) > 2 and len(service.egraphs._cache) == 2
+    assert len(service.egraphs) == 2
+
+
+def test_service_general_13():
+    service = EGraphService.EGraphService()
+    assert not service.get_current_egraph_json()[0]
+    service.create_egraph("(* a 2)")
+    result, msg, data = service.get_current_egraph_json()
+    assert result and data[0] == "EGraph created."
+    assert data[1]["nodes"]["key"] == ["a", "2", "*"] and data[1]["roots"] == [2]
+
+
+def test_service_general_14():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(* a 2)")
+    service.add_rule("(* x 2)", "(<< x 1)")
+    service.apply([0])
+    service.move_fastbackward()
+    assert service.current_major == 0
+    service.add_root_expression("(+ b c)")
+    # The new root is the latest step, not part of the selected old one.
+    assert len(service.egraphs) == 3
+    assert service.egraphs[2][0].message == "Added root (+ b c)."
+    assert (service.current_major, service.current_minor) == (2, 0)
+    assert "b" not in service.egraphs[1][-1].json()["nodes"]["key"]
+    assert len(service.egraphs[2][0].json()["roots"]) == 2
+
+
+def test_service_general_15():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(* a 2)")
+    service.add_rule("(* x 2)", "(<< x 1)")
+    service.apply_all_rules()
+    service.move_fastbackward()
+    assert service.current_major == 0
+    service.compact()
+    # The compaction is the latest step, the steps before it are unchanged.
+    assert len(service.egraphs) == 3
+    assert [event.message for event in service.egraphs[2]] == ["EGraph compacted."]
+    assert (service.current_major, service.current_minor) == (2, 0)
+    assert len(service.egraphs[0]) == 1
+    positions = [event.position for events in service.egraphs for event in events]
+    assert positions == sorted(positions)
+    assert service.get_current_egraph()[2][0] == "EGraph compacted."
+
+
 ################################################################################
 # Export e-graph                        ########################################
 ################################################################################
@@ -100,6 +255,16 @@ def test_service_export():
     assert True
 
 
+def test_service_export_options():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(* 0 (* (+ a (* a 2)) 1))")
+    assert service.export("pdf", hops=-1) == (
+        False,
+        "Options must be non-negative integers.",
+    )
+    assert not service.export("pdf", max_nodes="3")[0]
+
+
 ################################################################################
 # Add rule                              ########################################
 ################################################################################
@@ -138,6 +303,19 @@ def test_service_add_rule_4():
     assert len(service.dict_of_rules) == 4
 
 
+def test_service_add_rule_5():
+    service = EGraphService.EGraphService()
+    guard = RewriteRule.is_nonzero_constant("y")
+    assert service.add_rule("(/ (* x y) y)", "(x)", guard)[0]
+    # The same rule with another condition (or none) is a different rule.
+    assert not service.add_rule("(/ (* x y) y)", "(x)", RewriteRule.is_nonzero_constant("y"))[0]
+    assert service.add_rule("(/ (* x y) y)", "(x)", bidirectional=False)[0]
+    assert service.add_rule("(/ (* x y) y)", "(x)", RewriteRule.is_constant("y"))[0]
+    assert [rule.condition is None for rule in service.dict_of_rules.values()] == [
+        False, True, True, False
+    ]
+
+
 ################################################################################
 # Apply rule                            ########################################
 ################################################################################
@@ -244,6 +422,14 @@ def test_service_get_snapshot_2():
     assert "'optimalTerm': 'a'" in str(result)
 
 
+def test_service_get_snapshot_3():
+    service = EGraphService.EGraphService()
+    service.create_egraph("(/ (* a 2) 2)")
+    service.add_rule("(/ (* x y) y)", "(x)", RewriteRule.is_nonzero_constant("y"))
+    # Conditions cannot be saved, the rule must not lose its guard.
+    assert service.get_snapshot()["RewriteRules"] == {1: ["1", "(x)", "(/ (* x y) y)"]}
+
+
 ################################################################################
 # Set service                           ########################################
 ################################################################################
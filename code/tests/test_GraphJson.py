@@ -0,0 +1,60 @@
+"""This file contains tests to ensure the capability and correctness of GraphJson.py
+The tests are separated into groups to test different aspects of GraphJson.py.
+
+- Number of Tests: 3
+
+"""
+
+import json
+import AbstractSyntaxTree
+import EGraph
+import GraphJson
+import RewriteRule
+import Trace
+
+
+################################################################################
+# JSON export                           ########################################
+################################################################################
+
+
+def test_graph_json_1():
+    g = EGraph.EGraph()
+    root = g.add_root(g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node))
+    graph = g.egraph_to_json(marked_eclasses=[root])
+    assert graph == {
+        "classes": [0, 1, 2],
+        "roots": [2],
+        "marked": [2],
+        "nodes": {"eclass": [0, 1, 2], "key": ["a", "2", "*"], "children": [[], [], [0, 1]]},
+    }
+    assert json.loads(json.dumps(graph)) == graph
+    assert g.egraph_to_json(marked_eclasses=[root]) is graph
+
+
+def test_graph_json_2():
+    g = EGraph.EGraph()
+    id1 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ a b)").root_node)
+    id2 = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ b a)").root_node)
+    g.merge(id1, id2)
+    graph = GraphJson.eclasses_to_json(g.classes, g._find, [id1, id2])
+    nodes = graph["nodes"]
+    assert len(graph["classes"]) == 3 and graph["marked"] == [g._find(id1)]
+    assert [key for key in nodes["key"] if key == "+"] == ["+", "+"]
+    for eclass_id, children in zip(nodes["eclass"], nodes["children"]):
+        assert eclass_id in graph["classes"]
+        assert all(child in graph["classes"] for child in children)
+
+
+def test_graph_json_3():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    g, events = EGraph.apply_rules(rules, g, trace=Trace.TRACE_FULL)
+    merged = next(event for event in events if event.message.endswith("MERGED."))
+    assert merged.json() == GraphJson.eclasses_to_json(
+        merged.journal.snapshot(merged.position).classes,
+        merged.journal.snapshot(merged.position).find,
+    )
+    assert events[-1].json()["nodes"]["key"].count("<<") == 1
+    assert Trace.TraceEvent("No journal.").json() is None
@@ -0,0 +1,73 @@
+"""This file contains tests to ensure the capability and correctness of Scheduler.py
+The tests are separated into groups to test different aspects of Scheduler.py.
+
+- Number of Tests: 5
+
+"""
+
+import AbstractSyntaxTree
+import EGraph
+import RewriteRule
+import Scheduler
+
+
+################################################################################
+# Scheduler                             ########################################
+################################################################################
+
+
+def test_scheduler_1():
+    scheduler = Scheduler.Scheduler()
+    rule = RewriteRule.RewriteRule("switch", "(+ x y)", "(+ y x)")
+    assert scheduler.can_search(0, rule)
+    assert scheduler.accept_matches(0, rule, [None] * 100000)
+    assert scheduler.can_stop(0)
+
+
+################################################################################
+# BackoffScheduler                      ########################################
+################################################################################
+
+
+def test_backoff_scheduler_1():
+    scheduler = Scheduler.BackoffScheduler(match_limit=2, ban_length=3)
+    rule = RewriteRule.RewriteRule("switch", "(+ x y)", "(+ y x)")
+    assert scheduler.accept_matches(0, rule, [None] * 2)
+    assert not scheduler.accept_matches(1, rule, [None] * 3)
+    assert scheduler.is_banned(2, rule)
+    assert scheduler.is_banned(3, rule)
+    assert not scheduler.is_banned(4, rule)
+
+
+def test_backoff_scheduler_2():
+    scheduler = Scheduler.BackoffScheduler(match_limit=2, ban_length=3)
+    rule = RewriteRule.RewriteRule("switch", "(+ x y)", "(+ y x)")
+    assert not scheduler.accept_matches(0, rule, [None] * 3)
+    assert scheduler.accept_matches(3, rule, [None] * 4)
+    assert not scheduler.accept_matches(4, rule, [None] * 5)
+    assert scheduler.stats[rule].banned_until == 4 + 6
+
+
+def test_backoff_scheduler_3():
+    scheduler = Scheduler.BackoffScheduler(match_limit=2, ban_length=3)
+    rule = RewriteRule.RewriteRule("switch", "(+ x y)", "(+ y x)")
+    scheduler.set_match_limit(rule, 10)
+    assert scheduler.accept_matches(0, rule, [None] * 10)
+    assert not scheduler.accept_matches(1, rule, [None] * 11)
+    assert not scheduler.can_stop(1)
+    assert not scheduler.is_banned(1, rule)
+    assert scheduler.can_stop(2)
+
+
+def test_backoff_scheduler_4():
+    ast = AbstractSyntaxTree.AbstractSyntaxTree("(+ a (+ b c))")
+    egraph = EGraph.EGraph()
+    eterm_id = egraph.add_node(ast.root_node)
+    rules = [
+        RewriteRule.RewriteRule("switch", "(+ x y)", "(+ y x)"),
+        RewriteRule.RewriteRule("assoc", "(+ x (+ y z))", "(+ (+ x y) z)"),
+    ]
+    scheduler = Scheduler.BackoffScheduler(match_limit=1, ban_length=2)
+    egraph, dbg, best = EGraph.equality_saturation(rules, eterm_id, egraph, scheduler)
+    assert any(stats.times_banned > 0 for stats in scheduler.stats.values())
+    assert len(best.split()) == 5
@@ -0,0 +1,127 @@
+"""This file contains tests to ensure the capability and correctness of Trace.py
+The tests are separated into groups to test different aspects of Trace.py.
+
+- Number of Tests: 8
+
+"""
+
+import pytest
+import AbstractSyntaxTree
+import EGraph
+import RewriteRule
+import Trace
+
+
+################################################################################
+# Trace modes                           ########################################
+################################################################################
+
+
+def test_trace_off_1():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    egraph, dbg, best = EGraph.equality_saturation(rules, eterm_id, g, trace=Trace.TRACE_OFF)
+    assert dbg == []
+    assert best == "(<< a 1)"
+
+
+def test_trace_events_1():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    g, events = EGraph.apply_rules(rules, g, trace=Trace.TRACE_EVENTS)
+    matched = [event for event in events if "MATCHED" in event.message]
+    assert len(matched) == 1
+    assert matched[0].rule == "shift"
+    assert set(matched[0].environment) == {"x"}
+    assert matched[0].journal is None and matched[0][1] is None
+    assert events[-1][0] == "Done."
+    assert events[-1].counters["unions_performed"] == g.unions_performed
+
+
+def test_trace_mode_invalid():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    with pytest.raises(ValueError):
+        EGraph.apply_rules([], g, trace="verbose")
+
+
+################################################################################
+# Snapshots                             ########################################
+################################################################################
+
+
+def test_trace_full_1():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node)
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    g, events = EGraph.apply_rules(rules, g, trace=Trace.TRACE_FULL)
+    merge = next(event for event in events if "MERGE colored" in event.message)
+    dot = merge[1]
+    assert dot.count('fillcolor="crimson"') == 2
+    # The snapshot still shows the E-Graph before the merge.
+    assert dot.count("cluster-") > g.number_of_eclasses()
+
+
+def test_trace_full_2():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ a b)").root_node)
+    rules = [RewriteRule.RewriteRule("commute", "(+ x y)", "(+ y x)")]
+    g, events = EGraph.apply_rules(rules, g, trace=Trace.TRACE_FULL)
+    snapshot = events[-1].journal.snapshot(events[-1].position)
+    assert len(snapshot.classes) == g.number_of_eclasses()
+    for eclass_id in range(len(g.u)):
+        assert snapshot.find(eclass_id) == g._find(eclass_id)
+
+
+################################################################################
+# Journal                               ########################################
+################################################################################
+
+
+def _as_sets(classes):
+    return {eclass_id: set(enodes) for eclass_id, enodes in classes.items()}
+
+
+def test_journal_1():
+    g = EGraph.EGraph()
+    eterm_id = g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* (+ a b) (+ a c))").root_node)
+    g.journal = Trace.Journal(g, keyframe_interval=2)
+    rules = [
+        RewriteRule.RewriteRule("b=c", "(b)", "(c)"),
+        RewriteRule.RewriteRule("commute", "(+ x y)", "(+ y x)"),
+    ]
+    g, events, best = EGraph.equality_saturation(rules, eterm_id, g, trace=Trace.TRACE_FULL)
+    assert any(entry[0] == "replace" for entry in g.journal.entries)
+    assert len(g.journal.keyframes) > 1
+    replayed = g.journal.snapshot(events[-1].position)
+    assert _as_sets(replayed.classes) == _as_sets(g.classes)
+    # Replaying from the first keyframe gives the same E-Graph.
+    first = g.journal.keyframes[0].copy()
+    for entry in g.journal.entries:
+        first.apply(entry)
+    assert _as_sets(first.classes) == _as_sets(g.classes)
+
+
+def test_journal_2():
+    g = EGraph.EGraph()
+    g.add_root(g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(* a 2)").root_node))
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(- b c)").root_node)
+    rules = [RewriteRule.RewriteRule("shift", "(* x 2)", "(<< x 1)")]
+    g, events = EGraph.apply_rules(rules, g, trace=Trace.TRACE_FULL)
+    before = _as_sets(g.journal.snapshot(events[-1].position).classes)
+    g.compact(prune=True)
+    events = []
+    Trace.record(events, g, Trace.TRACE_FULL, "EGraph compacted.")
+    assert _as_sets(g.journal.snapshot(events[0].position).classes) == _as_sets(g.classes)
+    assert len(before) == 7 and len(g.classes) == 4
+
+
+def test_journal_3():
+    g = EGraph.EGraph()
+    g.add_node(AbstractSyntaxTree.AbstractSyntaxTree("(+ a b)").root_node)
+    g.journal = Trace.Journal(g)
+    snapshot = g.journal.keyframes[0].copy()
+    with pytest.raises(ValueError):
+        snapshot.apply(("compact",))
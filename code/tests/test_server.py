@@ -1,7 +1,7 @@
 """This file contains tests to ensure the capability and correctness of server.py
 The tests are separated into groups to test different aspects of server.py.
 
-- Number of Tests: 22
+- Number of Tests: 28
 
 """
 
@@ -162,6 +162,29 @@ def test_load_egraph_2():
     assert "'response': 'False'" in str(response.json())
 
 
+################################################################################
+# Test: /loadegraphjson                 ########################################
+################################################################################
+
+
+def test_load_egraph_json_1():
+    client = TestClient(app)
+    client.post("/createegraph", json={"payload": "(+ x 1)"})
+    response = client.get("/loadegraphjson").json()
+    assert response["response"] == "True"
+    assert response["payload2"]["nodes"]["key"] == ["x", "1", "+"]
+    assert response["payload2"]["nodes"]["children"][2] == [0, 1]
+
+
+def test_load_egraph_json_2():
+    import server
+
+    importlib.reload(server)
+    client = TestClient(app)
+    response = client.get("/loadegraphjson")
+    assert "'response': 'False'" in str(response.json())
+
+
 ################################################################################
 # Test: /move                           ########################################
 ################################################################################
@@ -224,6 +247,58 @@ def test_extract_term_2():
     assert "'response': 'True'" and "a" in str(response.json())
 
 
+################################################################################
+# Test: /extracttopk                    ########################################
+################################################################################
+
+
+def test_extract_top_k_1():
+    client = TestClient(app)
+    client.post("/createegraph", json={"payload": "(* a 2)"})
+    client.post("/addrule", json={"lhs": "(* x 2)", "rhs": "(<< x 1)"})
+    client.post("/applyallrules")
+    response = client.post("/extracttopk", json={"payload": 2})
+    assert response.json()["response"] == "True"
+    assert response.json()["payload"] == [["(<< a 1)", 1], ["(* a 2)", 2]]
+
+
+def test_extract_top_k_2():
+    client = TestClient(app)
+    client.post("/createegraph", json={"payload": "(* a 2)"})
+    response = client.post("/extracttopk", json={"payload": "k"})
+    assert response.json()["response"] == "False"
+
+
+################################################################################
+# Test: /addroot, /extractall           ########################################
+################################################################################
+
+
+def test_extract_all_1():
+    client = TestClient(app)
+    client.post("/createegraph", json={"payload": "(* a 2)"})
+    client.post("/addroot", json={"payload": "(+ (* a 2) 1)"})
+    response = client.post("/extractall", json={"share": True})
+    assert response.json()["response"] == "True"
+    assert response.json()["payload"] == {
+        "terms": ["$0", "(+ $0 1)"],
+        "bindings": [["$0", "(<< a 1)"]],
+    }
+
+
+def test_extract_all_2():
+    client = TestClient(app)
+    client.post("/createegraph", json={"payload": "(* a 2)"})
+    client.post("/addroot", json={"payload": "(+ (* a 2) 1)"})
+    for share in ("false", 0, None):
+        response = client.post("/extractall", json={"share": share})
+        assert response.json() == {
+            "response": "False", "msg": "Invalid share flag.", "payload": {}
+        }
+    response = client.post("/extractall", json={"share": False})
+    assert response.json()["payload"]["bindings"] == []
+
+
 ################################################################################
 # Test: /exportegraph                   ########################################
 ################################################################################